@@ -8,11 +8,9 @@ import numpy as np
 import copy
 import vtk
 import math
-from scipy import spatial
 from scipy.optimize import minimize
 from ampscan.core import AmpObject
 from ampscan.vis import vtkRenWin
-from ampscan.analyse import create_slices, est_volume, calc_csa
 
 # For doc examples
 import os
@@ -138,8 +136,9 @@ class align(object):
             initTransform = np.eye(4)
         Rs[:, :, 0] = initTransform[:3, :3]
         Ts[:, 0] = initTransform[3, :3]
-        fC = self.s.vert[self.s.faces].mean(axis=1)
-        kdTree = spatial.cKDTree(fC)
+        # The static face centroids and their KD-tree, shared between calls 
+        fC = self.s.faceCentroids
+        kdTree = self.s.faceTree
         self.m.rigidTransform(Rs[:, :, 0], Ts[:, 0])
         inlier = math.ceil(self.m.vert.shape[0]*inlier)
         [dist, idx] = kdTree.query(self.m.vert, 1)
@@ -542,8 +541,8 @@ class align(object):
         Direct minimisation of the volume. 
         1) Translate moving object to match minZ of static 
         2) Calculate volume to static z0
-        3) Cumulative sum the slices and evaluate volume
-        4) Find slice nearest volume of static 
+        3) Find the height of moving with the same volume from its 
+        cumulative volume profile, see AmpObject.calcVolumeProfile
         
         Parameters
         ----------
@@ -565,53 +564,16 @@ class align(object):
         # Keep track of T
         T = dZ
         self.m.vert[:, 2] += dZ
-        mMaxZ = self.m.vert[:, 2].max()
-        # Create slices of static from 2 mm below dist to z0
-        # print([sMinZ + 1, z0])
-        sPolys = create_slices(self.s, [sMinZ + 1, z0], 0.5, typ='real_intervals', axis=2)
-        
-        sVol = est_volume(sPolys)
-        # Create slices of static from 2 mm below dist to z0
-        mPolys = create_slices(self.m, [sMinZ + 1, mMaxZ - 1], 0.5, typ='real_intervals', axis=2)
-        # Iterate through mPolys
-        csa = calc_csa(mPolys)
-        # Get the distance between each slice 
-        d = []
-        for p in mPolys: 
-            d.append(p[:, 2].mean())
-        d = np.asarray(d)
-        # Get distance between each slice 
-        dist = np.abs(d[1:]- d[:-1])
-        vol = np.c_[csa[1:], csa[:-1]]
-        vol = np.mean(vol, axis=1) * dist
-        # Add in 0 at start to ease indexing 
-        vol = np.insert(vol, 0, 0)
-        
-        # print(sVol)
-        # print(vol)
-        vol = np.cumsum(vol) - sVol
-        # print(vol)
-        for (i, v) in enumerate(vol):
-            if v >= 0:
-                break
-        # Linear interpolate z in between slices, different as (n-1) sections to slices
-        zl = d[i - 1]
-        zh = d[i]
-        vl = vol[i - 1]
-        vh = vol[i]
-        dz = zh - zl
-        dv = vh - vl
-        # Absolute value of z to reach
-        z =  zl + ((0 - vl)/ dv) * dz;
-        # print(z)
+        self.m.markModified()
+        # Volume of static from 1 mm above the distal end to z0, from the 
+        # cumulative volume profiles
+        sVol = self.s.volumeBelow(z0) - self.s.volumeBelow(sMinZ + 1)
+        # Find the height of moving with the same volume above the same level
+        z = self.m.heightAtVolume(self.m.volumeBelow(sMinZ + 1) + sVol)
         #  Translate by the calculated z value 
-        # z -= d[0]
         T -= z
-        # print(vl, sVol, vh)
         self.m.vert[:, 2] -= z
-
-
-
+        self.m.markModified()
 
         self.R = np.eye(3)
         self.T = [0, 0, T]
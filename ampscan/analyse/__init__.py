@@ -1,5 +1,7 @@
-from .analyse import (calc_volume_closed, create_slices, calc_perimeter, calc_widths, calc_csa, est_volume, 
-                      visualise_slices, plot_slices, MeasurementsOut, CMapOut, logEuPath)
+from .analyse import (calc_volume_closed, create_slices, slice_mesh, calc_perimeter, calc_widths, calc_csa, est_volume, 
+                      calc_metrics, 
+                      visualise_slices, plot_slices, MeasurementsOut, CMapOut, logEuPath, 
+                      traceLoops, fan_planes)
 from .output import getPDF, generateRegBinsCsv, generateRegCsv, generate_spec
 
 del analyse, output
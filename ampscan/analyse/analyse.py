@@ -12,6 +12,7 @@ import matplotlib.colorbar as clb
 from mpl_toolkits.mplot3d import Axes3D
 from collections import defaultdict
 from .output import getPDF
+from ..utils import crossPlanes, chainOrder
 from math import floor
 #from .cython_ext import planeEdgeIntersect_cy, logEuPath_cy
 import os
@@ -24,6 +25,11 @@ def calc_volume_closed(amp_in, return_closed=False):
     Calculates the volume of a closed surface. If the surface is not closed the algorithm fills in the holes using a simple
     hole filling algorithm, the surface without holes can be accessed if return_closed is set to True.
 
+    The volume is the sum of the signed volumes of the tetrahedra from each 
+    face to the centre of the vertices. Each hole is closed by a fan of 
+    faces from its boundary loop to the mean of its vertices, as in 
+    AmpObject.close, so the contribution of each fan is added from the 
+    boundary edges without building the closed surface
 
     Parameters
     ----------
@@ -39,22 +45,27 @@ def calc_volume_closed(amp_in, return_closed=False):
     amp: AmpObject
         If return_closed is True, then the closed shape is returned 
     """
-    amp = amp_in.close()
-    # Calculate the area of each face in the array using vector cross product
-    v01 = amp.vert[amp.faces[:, 1], :] - amp.vert[amp.faces[:, 0], :]
-    v02 = amp.vert[amp.faces[:, 2], :] - amp.vert[amp.faces[:, 0], :]
-    cp = np.square(np.cross(v01, v02))
-    area = 0.5 * np.sqrt(cp.sum(axis=1))
-    # Get surface volume contributions 
-    sVC = area * amp.vert[amp.faces, 2].mean(axis=1) * amp.norm[:, 2]
+    # Work relative to the centre to keep precision
+    vert = amp_in.vert.astype(float)
+    vert -= vert.mean(axis=0)
+    v0, v1, v2 = (vert[amp_in.faces[:, i]] for i in range(3))
+    vol = np.einsum('ij,ij->', v0, np.cross(v1, v2))
+    a, b, hole = amp_in.getBoundaryEdges()
+    if len(hole):
+        # The fan of faces (b, a, midpoint) around each hole
+        count = np.bincount(hole)[:, None]
+        midpoint = np.stack([np.bincount(hole, vert[a, i]) 
+                             for i in range(3)], axis=1) / count
+        vol += np.einsum('ij,ij->', midpoint[hole], np.cross(vert[b], vert[a]))
+    vol /= 6
     if return_closed is True:
-        return sVC.sum(), amp
+        return vol, amp_in.close()
     else:
-        return sVC.sum()
+        return vol
 
 
 
-def create_slices(amp, *args,  typ='slices', axis = 2, order=True):
+def create_slices(amp, *args,  typ='slices', axis = 2, order=True, normal=None):
     r"""
     Generate polygons from planar slices through the AmpObject. The slices are either defined as a 
     list of positions in some axis
@@ -73,6 +84,9 @@ def create_slices(amp, *args,  typ='slices', axis = 2, order=True):
         The height of the slice planes
     axis: int, default 2
         The index of the axis to take the slices along
+    normal: array_like, default None
+        The normal of oblique slice planes, see slice_mesh. If given, the 
+        slices are positions along the normal instead of the axis
     
     Returns
     -------
@@ -98,8 +112,12 @@ def create_slices(amp, *args,  typ='slices', axis = 2, order=True):
         slices = np.append(slices, lim[1])
     elif typ == 'norm_intervals':
         # Get the minimum and maximum of the limb
-        limb_min = amp.vert[:, axis].min()
-        limb_max = amp.vert[:, axis].max()
+        if normal is None:
+            h = amp.vert[:, axis]
+        else:
+            h = amp.vert.dot(normal) / np.linalg.norm(normal)
+        limb_min = h.min()
+        limb_max = h.max()
         limb_len = limb_max - limb_min
         lim = args[0]
         intervals = args[1]
@@ -111,45 +129,269 @@ def create_slices(amp, *args,  typ='slices', axis = 2, order=True):
         return
         # Return error that typ is an invalid value 
     
-    # Now start to calculate the polyons on each slice
+    points, offsets, sliceInd = slice_mesh(amp, slices, axis=axis, normal=normal)
+    # Keep the first polygon in each slice, slices that miss are dropped
+    first = np.flatnonzero(np.diff(sliceInd, prepend=-1) != 0)
+    first = first[np.argsort(sliceInd[first], kind='stable')]
+    return [points[offsets[i]:offsets[i+1]] for i in first]
+
+def slice_mesh(amp, slices, axis=2, normal=None):
+    r"""
+    Slice the AmpObject with all the planes in one pass. The edges crossing 
+    each plane are found from the edge index of the AmpObject, see 
+    AmpObject.getCrossingEdges, then the crossings are ordered into 
+    polygons for all the planes together and intersected at once. 
+    
+    Oblique planes are sliced by projecting the vertices onto the normal of 
+    the planes, once for each normal, rather than rotating the mesh
+    
+    Parameters
+    ----------
+    amp: AmpObject 
+        The AmpObject to analyse
+    slices: array_like
+        The positions of the slice planes in the specified axis, or along 
+        the normal
+    axis: int, default 2
+        The index of the axis to take the slices along
+    normal: array_like, default None
+        The [3] normal of all the planes, or the [n x 3] normal of each 
+        plane, such as from fan_planes. If given, this is used instead of 
+        axis
     
-    # Get the vertices on each edges 
-    vE = amp.vert[:, axis][amp.edges]
-    # Find all vertices below plane 
-    polys = []
-    for plane in slices:
-        try:
-            ind = vE <= plane
-            # Select edges with one vertex above and one below the slice plane 
-            validEdgeInd = np.where(np.logical_xor(ind[:,0], ind[:,1]))[0]
-            validfE = amp.faceEdges[validEdgeInd, :].astype(int)
-            faceOrder = logEuPath(validfE)
-            # Get array of three edges attached to each face
-            validEdges = amp.edgesFace[faceOrder, :]
-            # Remove the edge that is not intersected by the plane
-            edges = validEdges[np.isin(validEdges, validEdgeInd)].reshape([-1,2])
-            # Remove the duplicate edge from order 
-            e = edges.flatten()
-            sortE = []
-            for ed in e:
-                if ed not in sortE:
-                    sortE.append(ed)
-            sortE.append(sortE[0])
-            # Add first edge to end of array
-    #            sortE = np.append(sortE, sortE[0])
-            sortE = np.asarray(sortE)
-            polyEdge = amp.edges[sortE]
-            EdgePoints = np.c_[amp.vert[polyEdge[:,0], :], 
-                                amp.vert[polyEdge[:,1], :]]
-            #Create poly from 
-            polys.append(planeEdgeIntersect_cy(EdgePoints, plane, axis))
-        except:
-            continue
-    return polys
+    Returns
+    -------
+    points: ndarray
+        The vertices of all the polygons, each polygon is closed by 
+        repeating its first vertex
+    offsets: ndarray
+        The start of each polygon in points, with the total number of 
+        points appended
+    sliceInd: ndarray
+        The index of the slice of each polygon, the polygons are sorted by 
+        the position of their slice, grouped by normal
+
+    Examples
+    -------
+    >>> from ampscan import AmpObject
+    >>> amp = AmpObject(filename)
+    >>> points, offsets, sliceInd = slice_mesh(amp, [-150, -100, -50, 0])
+    >>> polys = np.split(points, offsets[1:-1])
+    >>> normal, d = fan_planes(np.arange(0, 180, 10))
+    >>> points, offsets, sliceInd = slice_mesh(amp, d, normal=normal)
+    """
+    slices = np.asarray(slices, dtype=float).ravel()
+    if normal is None:
+        pOrd = np.argsort(slices, kind='stable')
+        sl = slices[pOrd]
+        # The edges crossing each plane, from the index cached on the AmpObject
+        edge, plane = amp.getCrossingEdges(sl, axis=axis)
+        h = amp.vert[:, axis].astype(float)[amp.edges[edge]]
+    else:
+        normal = np.broadcast_to(np.asarray(normal, dtype=float), 
+                                 (len(slices), 3))
+        normal = normal / np.linalg.norm(normal, axis=1)[:, None]
+        normals, nInd = np.unique(normal, axis=0, return_inverse=True)
+        nInd = nInd.ravel()
+        pOrd = np.lexsort([slices, nInd])
+        sl = slices[pOrd]
+        start = np.searchsorted(nInd[pOrd], np.arange(len(normals) + 1))
+        edge, plane, h = [], [], []
+        for i, n in enumerate(normals):
+            # Project the vertices onto the normal and find where they lie 
+            # between the planes
+            hV = amp.vert.dot(n)
+            rank = np.searchsorted(sl[start[i]:start[i+1]], hV, side='left')
+            e, p = crossPlanes(rank.astype(np.int32)[amp.edges])
+            edge.append(e)
+            plane.append(p + start[i])
+            h.append(hV[amp.edges[e]])
+        edge = np.concatenate(edge)
+        plane = np.concatenate(plane)
+        h = np.concatenate(h)
+        o = np.lexsort([edge, plane])
+        edge = edge[o]
+        plane = plane[o]
+        h = h[o]
+    # Link the crossings through the faces they share within each plane, 
+    # edges on the brim each end an open path
+    fE = amp.faceEdges[edge, :].astype(np.int64)
+    brim = fE < 0
+    fE = fE + plane[:, None] * len(amp.faces)
+    fE[brim] = -np.arange(1, brim.sum() + 1)
+    verts, rows, offsets = traceLoops(fE)
+    edge = edge[rows]
+    plane = plane[rows]
+    h = h[rows]
+    # Intersect the edges with the planes 
+    v0 = amp.vert[amp.edges[edge, 0], :].astype(float)
+    v1 = amp.vert[amp.edges[edge, 1], :].astype(float)
+    t = (sl[plane] - h[:, 0]) / (h[:, 1] - h[:, 0])
+    points = v0 + t[:, None] * (v1 - v0)
+    if normal is None:
+        points[:, axis] = sl[plane]
+    # Close each polygon
+    points = np.insert(points, offsets[1:], points[offsets[:-1]], axis=0)
+    offsets = offsets + np.arange(len(offsets))
+    sliceInd = pOrd[plane[offsets[:-1] - np.arange(len(offsets) - 1)]]
+    return points.astype(np.float32), offsets, sliceInd
+
+def fan_planes(angles, centre=None, hinge=None, normal=None):
+    r"""
+    Calculate a fan of planes which all pass through a hinge line, such as 
+    radial planes around the long axis of the limb, for use with slice_mesh
+    
+    Parameters
+    ----------
+    angles: array_like
+        The angle of each plane about the hinge in degrees
+    centre: array_like, default None
+        A point on the hinge line, if None then the origin
+    hinge: array_like, default None
+        The direction of the hinge line, if None then the z axis
+    normal: array_like, default None
+        The normal of the plane at an angle of 0, this is made 
+        perpendicular to the hinge. If None then the x axis
+    
+    Returns
+    -------
+    normals: ndarray
+        The [n x 3] normal of each plane
+    slices: ndarray
+        The position of each plane along its normal
+
+    Examples
+    --------
+    >>> normals, slices = fan_planes([0, 45, 90])
+    >>> normals.round(3).tolist()
+    [[1.0, 0.0, 0.0], [0.707, 0.707, 0.0], [0.0, 1.0, 0.0]]
+
+    """
+    if hinge is None:
+        hinge = [0, 0, 1]
+    if normal is None:
+        normal = [1, 0, 0]
+    hinge = np.asarray(hinge, dtype=float)
+    hinge = hinge / np.linalg.norm(hinge)
+    normal = np.asarray(normal, dtype=float)
+    normal = normal - normal.dot(hinge) * hinge
+    normal = normal / np.linalg.norm(normal)
+    theta = np.deg2rad(np.asarray(angles, dtype=float)).ravel()
+    normals = (np.cos(theta)[:, None] * normal + 
+               np.sin(theta)[:, None] * np.cross(hinge, normal))
+    if centre is None:
+        centre = np.zeros(3)
+    return normals, normals.dot(centre)
+
+def calc_metrics(points, offsets, axis=None):
+    r"""
+    Calculate the measurements of a batch of polygons in one pass. The 
+    polygons are given as one array of points with the offsets to the 
+    start of each, as returned by slice_mesh, and the sums over each 
+    polygon are taken with np.add.reduceat
+
+    Parameters
+    ----------
+    points: array_like
+        The vertices of all the polygons
+    offsets: array_like
+        The start of each polygon in points, with the total number of 
+        points appended
+    axis: int, default None
+        The index of the axis the polygons were sliced along, used for the 
+        widths and position. If None, then the axis with the smallest 
+        extent is found for each polygon
+
+    Returns
+    -------
+    table: ndarray
+        A structured array with a row for each polygon and the fields 
+        perimeter, csa (the cross-sectional area), cor_width and sag_width 
+        (the widths in the first and second of the other axes) and position 
+        (the mean position along the axis)
+
+    Examples
+    --------
+    >>> from ampscan import AmpObject
+    >>> amp = AmpObject(filename)
+    >>> points, offsets, sliceInd = slice_mesh(amp, [-150, -100, -50, 0])
+    >>> table = calc_metrics(points, offsets, axis=2)
+    >>> csa = table['csa']
+
+    """
+    points = np.asarray(points, dtype=float)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    table = np.zeros(len(offsets) - 1, dtype=[('perimeter', float), 
+                                               ('csa', float), 
+                                               ('cor_width', float), 
+                                               ('sag_width', float), 
+                                               ('position', float)])
+    n = np.diff(offsets)
+    full = np.flatnonzero(n)
+    if len(full) == 0:
+        return table
+    start = offsets[full]
+    last = offsets[1:][full] - 1
+    # The segments to the next point, none from the last point of each
+    cols = np.ascontiguousarray(points.T)
+    d = np.diff(cols, axis=1, append=cols[:, -1:])
+    d[:, last] = 0
+    x, y, z = cols
+    dx, dy, dz = d
+    table['perimeter'][full] = np.add.reduceat(np.sqrt(dx*dx + dy*dy + dz*dz), 
+                                               start)
+    # The vector area, closing the polygon back to its first point, p0, 
+    # the sum of p x d less p0 x (pLast - p0) so it is relative to p0
+    cross = [y*dz - z*dy, z*dx - x*dz, x*dy - y*dx]
+    area = np.stack([np.add.reduceat(c, start) for c in cross], axis=1)
+    area -= np.cross(points[start], points[last] - points[start])
+    table['csa'][full] = 0.5 * np.sqrt((area * area).sum(axis=1))
+    # The extent of each polygon in each axis
+    extent = np.stack([np.maximum.reduceat(c, start) - 
+                       np.minimum.reduceat(c, start) for c in cols], axis=1)
+    if axis is None:
+        ix = np.argmin(extent, axis=1)
+    else:
+        ix = np.full(len(full), axis)
+    ind = np.array([[1, 2], [0, 2], [0, 1]])[ix]
+    rows = np.arange(len(full))
+    table['cor_width'][full] = extent[rows, ind[:, 0]]
+    table['sag_width'][full] = extent[rows, ind[:, 1]]
+    mean = np.stack([np.add.reduceat(c, start) for c in cols], axis=1)
+    table['position'][full] = mean[rows, ix] / n[full]
+    return table
+
+def _joinPolys(polys):
+    r"""
+    Join a list of polygons into one array of points with the offsets to 
+    the start of each, for calc_metrics
+    """
+    n = [len(p) for p in polys]
+    points = np.concatenate([np.zeros([0, 3])] + list(polys))
+    return points, np.r_[0, np.cumsum(n, dtype=np.int64)]
+
+def _sliceAxis(points, offsets):
+    r"""
+    Return the axis the polygons were sliced along, the axis with the 
+    smallest total extent over the polygons which extend in at least two 
+    axes, so degenerate polygons such as the apex are ignored. The default 
+    axis 2 is returned if all the polygons are degenerate
+    """
+    full = np.flatnonzero(np.diff(offsets))
+    if len(full) == 0:
+        return 2
+    start = offsets[full]
+    extent = np.stack([np.maximum.reduceat(c, start) - 
+                       np.minimum.reduceat(c, start) for c in points.T], axis=1)
+    keep = (extent > 0).sum(axis=1) >= 2
+    if not keep.any():
+        return 2
+    return int(np.argmin(extent[keep].sum(axis=0)))
 
 def calc_perimeter(polys):
     r"""
-    Calculate the perimeter of each polygon from the slicing of the AmpObject  
+    Calculate the perimeter of each polygon from the slicing of the AmpObject, 
+    see calc_metrics to calculate all the measurements at once
 
     Parameters
     ----------
@@ -162,21 +404,11 @@ def calc_perimeter(polys):
     perimeter: array_like
         Returns the perimeter of the limb in mm along the axis 
     """
-    perimeter = np.zeros(len(polys))
-    # Iterate over each polygon
-    for i, p in enumerate(polys):
-        # Get the distances in each dimension between adjacent points 
-        d = p[1:, :] - p[:-1, :]
-        # Calculate the normalised distance between points 
-        dist = np.linalg.norm(d, axis=1)
-        # Sum the distances to get the perimeter
-        perimeter[i] = dist.sum()
-    # Return the perimeter and distance of limb over which perimeter calculated
-    return perimeter
+    return calc_metrics(*_joinPolys(polys))['perimeter']
 
 
 
-def calc_widths(polys):
+def calc_widths(polys, axis=None):
     r"""
     Calculate the coronal and sagittal widths of each polygon from the slicing of the AmpObject  
 
@@ -187,6 +419,9 @@ def calc_widths(polys):
     polys: list
         A list of numpy arrays, each array contains the vertices of the 
         polygon generated from the slice. Generate using ampscan.analyse.create_slices()
+    axis: int, default None
+        The index of the axis the polygons were sliced along. If None, the 
+        axis is found from the polygons, ignoring degenerate polygons
 
     Returns
     -------
@@ -195,18 +430,11 @@ def calc_widths(polys):
     sag_width: array_like
         Returns the sagittal width in mm along the axis 
     """
-    cor_width = np.zeros(len(polys))
-    sag_width = np.zeros(len(polys))
-    # Automatically check the axis of slicing by finding the axis with minimal deviation
-    # The correct axis should have 0 deviation
-    ix = np.argmin(polys[0].max(axis=0) - polys[0].min(axis=0))
-    # Remove from list the index for slicing axis 
-    ind = [0,1,2]
-    ind.remove(ix)
-    for i, p in enumerate(polys):
-        # Get the widths through min - max 
-        cor_width[i], sag_width[i] = p[:, ind].max(axis=0) - p[:, ind].min(axis=0)
-    return cor_width, sag_width
+    points, offsets = _joinPolys(polys)
+    if axis is None:
+        axis = _sliceAxis(points, offsets)
+    table = calc_metrics(points, offsets, axis=axis)
+    return table['cor_width'], table['sag_width']
 
 def calc_csa(polys):
     r"""
@@ -223,29 +451,9 @@ def calc_csa(polys):
     csa: array_like
         Returns the cross-sectional area of the limb in mm^2 along the axis 
     """
-    csa = np.zeros(len(polys))
-    # Automatically check the axis of slicing by finding the axis with minimal deviation
-    # The correct axis should have 0 deviation
-    ix = np.argmin(polys[0].max(axis=0) - polys[0].min(axis=0))
-    # Remove from list the index for slicing axis 
-    ind = [0,1,2]
-    ind.remove(ix)
-    # Iterate over each poly to calculcate cross sectional area 
-    for i, p in enumerate(polys):
-        csa[i] = 0.5*np.abs(
-                            np.dot(
-                                   p[:,ind[0]], 
-                                   np.roll(p[:,ind[1]], 1)
-                                  ) 
-                            -
-                            np.dot(
-                                   p[:,ind[1]], 
-                                   np.roll(p[:,ind[0]], 1)
-                                   )
-                            )
-    return csa
-
-def est_volume(polys):
+    return calc_metrics(*_joinPolys(polys))['csa']
+
+def est_volume(polys, axis=None):
     r"""
     Estimate the volume of the limb using bounds of the slices 
 
@@ -254,27 +462,22 @@ def est_volume(polys):
     polys: list
         A list of numpy arrays, each array contains the vertices of the 
         polygon generated from the slice. Generate using ampscan.analyse.create_slices()
+    axis: int, default None
+        The index of the axis the polygons were sliced along. If None, the 
+        axis is found from the polygons, ignoring degenerate polygons
 
     Returns
     -------
     Volume: float
         Returns the estimated volume of the limb in mm^3 along the axis 
     """
-    # Automatically check the axis of slicing by finding the axis with minimal deviation
-    # The correct axis should have 0 deviation
-    ix = np.argmin(polys[0].max(axis=0) - polys[0].min(axis=0))
-    # Remove from list the index for slicing axis 
-    ind = [0,1,2]
-    ind.remove(ix)
-    # Calculate the csa
-    csa = calc_csa(polys)
-    # Get the distance between each slice 
-    d = []
-    for p in polys: 
-        d.append(p[:, ix].mean())
-    d = np.asarray(d)
+    points, offsets = _joinPolys(polys)
+    if axis is None:
+        axis = _sliceAxis(points, offsets)
+    table = calc_metrics(points, offsets, axis=axis)
+    csa = table['csa']
     # Get distance between each slice 
-    dist = np.abs(d[1:]- d[:-1])
+    dist = np.abs(np.diff(table['position']))
     # Calculate volume between each slice by mutliplying the 
     # mean cross sectional area by the distance 
     vol = np.c_[csa[1:], csa[:-1]]
@@ -282,34 +485,85 @@ def est_volume(polys):
     return vol.sum()
     
 
+def traceLoops(arr):
+    r"""
+    Trace the loops through an array of undirected edges. The ends of the 
+    edges are grouped by vertex once, then each edge is linked to the next 
+    edge at its far end and the links are followed for all the loops 
+    together, so the cost does not grow with the square of the edges as in 
+    logEuPath. Vertices shared by more than two edges are passed straight 
+    through and vertices with one edge end an open path
+
+    Parameters
+    ----------
+    arr: array_like
+        The [n x 2] array of the vertices at either end of each edge
+    
+    Returns
+    -------
+    verts: ndarray
+        The vertex at the start of each step around the loops, the end 
+        vertex of an open path is not included
+    edges: ndarray
+        The row of arr used by each step around the loops
+    offsets: ndarray
+        The start of each loop in verts and edges, with the total number 
+        of steps appended. Each closed loop starts along its lowest row of 
+        arr, from the first to the second column, each open path starts 
+        from the end nearest its lowest row, and the loops are sorted by 
+        their first row
+
+    Examples
+    --------
+    >>> arr = np.array([[0, 1], [5, 6], [2, 0], [1, 2], [6, 5]])
+    >>> verts, edges, offsets = traceLoops(arr)
+    >>> verts, edges, offsets
+    (array([0, 1, 2, 5, 6]), array([0, 3, 2, 1, 4]), array([0, 3, 5]))
+
+    """
+    arr = np.asarray(arr)
+    n = len(arr)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(1, dtype=np.int64)
+    # Step h runs from end h along row h//2 to the other end, h^1
+    nodes, ends = np.unique(arr.ravel(), return_inverse=True)
+    ends = ends.ravel()
+    # Group the ends by vertex, the step into a vertex through one end 
+    # leaves through the next end of the vertex
+    o = np.argsort(ends, kind='stable')
+    deg = np.bincount(ends)
+    d = deg[ends[o]]
+    start = np.repeat(np.cumsum(deg) - deg, deg)
+    nextEnd = np.empty(2 * n, dtype=np.int64)
+    nextEnd[o] = o[start + (np.arange(2 * n) - start + 1) % d]
+    far = np.arange(2 * n) ^ 1
+    nxt = np.where(deg[ends[far]] > 1, nextEnd[far], -1)
+    order, offsets = chainOrder(nxt)
+    # Each loop is found running in both directions, keep one of them
+    first = order[offsets[:-1]]
+    last = order[offsets[1:] - 1]
+    closed = nxt[last] == first
+    keep = np.where(closed, first % 2 == 0, 
+                    (first // 2 < last // 2) | 
+                    ((first // 2 == last // 2) & (first % 2 == 0)))
+    # Sort the loops by their first row
+    loops = np.flatnonzero(keep)
+    loops = loops[np.argsort(first[loops] // 2)]
+    n = np.diff(offsets)[loops]
+    steps = order[np.repeat(offsets[loops] - np.cumsum(n) + n, n) + 
+                  np.arange(n.sum())]
+    return nodes[ends[steps]], steps // 2, np.r_[0, np.cumsum(n)]
+
 def logEuPath(arr):
     """
-    Calculate the eularian path for an array of edges so the vertices all connect
+    Calculate the eularian path for an array of edges so the vertices all connect.
+    Only the loop through the first edge is returned, see traceLoops for 
+    all the loops 
     """
-    vmax = arr.shape[0]
-    rows = list(range(vmax))
-    # order = np.zeros([vmax], dtype=int)
-    order = [];
-    i = 0
-    val = arr[i, 0]
-    nmax = vmax-1
-    for n in range(nmax):
-        del rows[i]
-        # order[n] = val
-        order.append(val)
-        i=0
-        for x in rows: 
-            if arr[x, 0] == val:
-                val = arr[x, 1]
-                break
-            if arr[x, 1] == val:
-                val = arr[x, 0]
-                break
-            i+=1
-    # order[n+1] = val
-    order.append(val)
-    order = np.asarray(order, dtype=int)
-    return order
+    verts, edges, offsets = traceLoops(arr)
+    verts = verts[:offsets[1]]
+    return np.r_[verts[0], verts[:0:-1]].astype(int)
 
 
 def planeEdgeIntersect_cy(arr, plane, axisInd):
@@ -421,10 +675,8 @@ def plot_slices(amp, axis=2, slWidth=10):
         A tuple of axes used for each subplot in the figure
 
     """
-    # Find the brim edges 
-    ind = np.where(amp.faceEdges[:,1] == -99999)[0]
     # Define max Z from lowest point on brim
-    maxZ = amp.vert[amp.edges[ind, :], 2].min()
+    maxZ = amp.vert[amp.getBoundaryVert(), 2].min()
     # Create slices
     slices = np.arange(amp.vert[:,2].min() + slWidth,
                         maxZ, slWidth)
@@ -516,8 +768,9 @@ def MeasurementsOut(amp, pos):
     # uses create_slices
     polys = create_slices(amp, slices2, axis=axis)
 
-    PolyArea = calc_csa(polys)
-    MLWidth, APWidth = calc_widths(polys)
+    table = calc_metrics(*_joinPolys(polys), axis=axis)
+    PolyArea = table['csa']
+    MLWidth, APWidth = table['cor_width'], table['sag_width']
 
     # Plot the figure 
     fig = plt.figure()
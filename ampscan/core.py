@@ -9,18 +9,58 @@ import numpy as np
 import os
 import struct
 import math
+import json
+from scipy import sparse, spatial
+from scipy.sparse.csgraph import connected_components
 
 from pyrsistent import v
 from ampscan.trim import trimMixin
 from ampscan.smooth import smoothMixin
 from ampscan.vis import visMixin
-from .analyse import create_slices, calc_perimeter, logEuPath
+from .analyse import create_slices, calc_perimeter, slice_mesh
+from .utils import crossPlanes, groupRank, chainOrder, weldVert
 
 
 # The file path used in doc examples
 filename = os.path.join(os.getcwd(), "tests", "stl_file.stl")
 
 
+class _meshStruct(object):
+    r"""
+    Descriptor for the arrays of the AmpObject which are derived from the 
+    vert and faces arrays. The array is calculated by the calc method when 
+    first accessed and is recalculated once the arrays it depends upon have 
+    been modified
+    
+    Parameters
+    ----------
+    name: str
+        Name of the attribute
+    calc: str
+        Name of the AmpObject method which calculates the array
+    vert: boolean, default True
+        If False, the array only depends upon the faces array
+
+    """
+    def __init__(self, name, calc, vert=True):
+        self.name = name
+        self.calc = calc
+        self.vert = vert
+
+    def __get__(self, amp, owner=None):
+        if amp is None:
+            return self
+        if not amp.isCached(self.name):
+            getattr(amp, self.calc)()
+        return amp._cache[self.name][-1]
+
+    def __set__(self, amp, value):
+        amp._setCache(self.name, value, self.vert)
+
+    def __delete__(self, amp):
+        amp._cache.pop(self.name, None)
+
+
 class AmpObject(trimMixin, smoothMixin, visMixin):
     r"""
     Base class for the ampscan project.
@@ -29,6 +69,12 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
     Flexible class able to deal with surface data using 3 or 4 node faces and 
     visualise nodal data such as FEA outputs or shape deviations
     
+    The structure of the mesh (edges, edgesFace, faceEdges, norm, vNorm, 
+    vertAdj, vertFaces, boundaryLoops, faceCentroids and the vertTree and 
+    faceTree spatial indicies) is calculated when first accessed and 
+    recalculated after the vert or faces arrays are assigned. If these arrays 
+    are modified in place, call markModified so the structure is recalculated
+    
     Parameters
     ----------
     data : str or dict
@@ -49,27 +95,140 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
 
     """
 
+    # Structure of the mesh, calculated on first access
+    edges = _meshStruct('edges', 'calcEdges', vert=False)
+    edgesFace = _meshStruct('edgesFace', 'calcEdgeFaces', vert=False)
+    faceEdges = _meshStruct('faceEdges', 'calcFaceEdges', vert=False)
+    norm = _meshStruct('norm', 'calcNorm')
+    vNorm = _meshStruct('vNorm', 'calcVNorm')
+    vertAdj = _meshStruct('vertAdj', 'calcVertAdj', vert=False)
+    vertFaces = _meshStruct('vertFaces', 'calcVertFaces', vert=False)
+    boundaryLoops = _meshStruct('boundaryLoops', 'calcBoundaryLoops', 
+                                vert=False)
+    faceCentroids = _meshStruct('faceCentroids', 'calcFaceCentroids')
+    vertTree = _meshStruct('vertTree', 'calcVertTree')
+    faceTree = _meshStruct('faceTree', 'calcFaceTree')
+    # Number of modifications to the vert and faces arrays
+    _vertVersion = 0
+    _faceVersion = 0
+    # Cached entries which cannot be pickled, dropped on copying
+    _transientCache = ('smoothSolver',)
+
     def __init__(self, data=None, stype='limb', unify=True, struc=True):
+        self._cache = {}
         self.stype = stype
         self.createCMap()
         self.landmarks = {}
         if isinstance(data, str):
             if data.lower().endswith('.aop'):
                 self.read_aop(data, unify, struc)
+            elif data.lower().endswith('.ampz'):
+                self.load_native(data)
             else:
                 self.read_stl(data, unify, struc)
         elif isinstance(data, dict):
             for k, v in data.items():
                 setattr(self, k, v)
-            if struc is True:
-                self.calcStruct()
         elif isinstance(data, bytes):
             self.read_bytes(data, unify, struc)
 
-    
+    @property
+    def vert(self):
+        r"""
+        The [n x 3] array of vertices of the mesh
+        """
+        return self._vert
+
+    @vert.setter
+    def vert(self, vert):
+        self._vert = vert
+        self.markModified(vert=True)
+
+    @property
+    def faces(self):
+        r"""
+        The [n x 3] array of vertex indicies of each face of the mesh
+        """
+        return self._faces
+
+    @faces.setter
+    def faces(self, faces):
+        self._faces = faces
+        self.markModified(vert=False, faces=True)
+
+    @property
+    def version(self):
+        r"""
+        Tuple of the number of modifications to the faces and vert arrays, 
+        which changes whenever the structure of the mesh becomes invalid
+        """
+        return (self._faceVersion, self._vertVersion)
+
+    def markModified(self, vert=True, faces=False):
+        r"""
+        Mark the vert and/or faces arrays as modified so the structure of the 
+        mesh is recalculated on next access. This is done automatically when 
+        the arrays are assigned, so is only needed after modifying them in 
+        place
+        
+        Parameters
+        ----------
+        vert: boolean, default True
+            If true, the vert array has been modified
+        faces: boolean, default False
+            If true, the faces array has been modified
+
+        Examples
+        --------
+        >>> amp = AmpObject(filename)
+        >>> amp.vert[:, 2] *= 2
+        >>> amp.markModified()
+
+        """
+        if vert is True:
+            self._vertVersion += 1
+        if faces is True:
+            self._faceVersion += 1
+
+    def isCached(self, name):
+        r"""
+        Return True if the named structure array has been calculated and is 
+        valid for the current vert and faces arrays
+        """
+        entry = self._cache.get(name)
+        if entry is None:
+            return False
+        faceVersion, vertVersion, _ = entry
+        return (faceVersion == self._faceVersion and 
+                vertVersion in (None, self._vertVersion))
+
+    def _getCache(self, name):
+        r"""
+        Return the named array if it is valid, otherwise None
+        """
+        if self.isCached(name):
+            return self._cache[name][-1]
 
+    def _setCache(self, name, value, vert=True):
+        r"""
+        Store the named array against the current version of the faces array 
+        and, if vert is true, the vert array
+        """
+        vertVersion = self._vertVersion if vert is True else None
+        self._cache[name] = (self._faceVersion, vertVersion, value)
+
+    def __getstate__(self):
+        r"""
+        Return the state of the object for pickle and copy.deepcopy, without 
+        the cached entries which cannot be pickled, such as the factorization 
+        from calcSmoothSolver. These are recalculated on next use
+        """
+        state = self.__dict__.copy()
+        state['_cache'] = {k: v for k, v in self._cache.items() 
+                           if k not in self._transientCache}
+        return state
 
-    def read_stl(self, filename, unify=True, struc=True):
+    def read_stl(self, filename, unify=True, struc=True, mmap=False, tol=None):
         """
         Function to read .stl file from filename and import data into 
         the AmpObj 
@@ -81,45 +240,35 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         unify: boolean, default True
             unify the coincident vertices of each face
         struc: boolean, default True
-            Calculate the underlying structure of the mesh, such as edges
+            Retained for compatibility, the underlying structure of the mesh, 
+            such as edges, is calculated when first accessed
+        mmap: boolean, default False
+            If true, the face records are memory mapped from the file rather 
+            than read into memory. Only the unified vert and faces arrays are 
+            materialised, reducing the peak memory when loading large scans
+        tol: float, default None
+            Weld tolerance used when unifying the vertices, see unifyVert
 
         """
         with open(filename, 'rb') as fh:
         # Defined no of bytes for header and no of faces
             HEADER_SIZE = 80
             COUNT_SIZE = 4
-            # State the data type and length in bytes of the normals and vertices
-            data_type = np.dtype([('normals', np.float32, (3, )),
-                                  ('vertices', np.float32, (9, )),
-                                  ('atttr', '<i2', (1, ))])
             # Read the header of the STL
             head = fh.read(HEADER_SIZE).lower()
             # Read the number of faces
             NFaces, = struct.unpack('@i', fh.read(COUNT_SIZE))
             # Read the remaining data and save as void, then close file
-            data = np.fromfile(fh, data_type)
+            if mmap is False:
+                data = np.fromfile(fh, self._stlRecord)
         # Test if the file is ascii
         if str(head[:5], 'utf-8') == 'solid':
             raise ValueError("ASCII files not supported")
-        # Write the data to a numpy arrays in AmpObj
-        tfcond = NFaces==data['vertices'].shape[0]			#assigns true or false to tfcond
-        if not tfcond:							#if tfcond is false, raise error
-            raise ValueError("File is corrupt")							#if true, move on
-        vert = np.resize(np.array(data['vertices']), (NFaces*3, 3))
-        norm = np.array(data['normals'])
-        faces = np.reshape(range(NFaces*3), [NFaces,3])
-        self.faces = faces
-        self.vert = vert
-        self.norm = norm
-        
-        # Call function to unify vertices of the array
-        if unify is True:
-            self.unifyVert()
-        # Call function to calculate the edges array
-#        self.fixNorm()
-        if struc is True:
-            self.calcStruct()
-        self.values = np.zeros([len(self.vert)])
+        if mmap is True:
+            # View the 50 byte records in place using the strided record dtype
+            data = np.memmap(filename, dtype=self._stlRecord, mode='r', 
+                             offset=HEADER_SIZE+COUNT_SIZE)
+        self._readRecords(data, NFaces, unify, struc, mmap, tol)
 
     def read_bytes(self, data, unify=True, struc=True):
         """
@@ -133,45 +282,104 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         unify: boolean, default True
             unify the coincident vertices of each face
         struc: boolean, default True
-            Calculate the underlying structure of the mesh, such as edges
+            Retained for compatibility, the underlying structure of the mesh, 
+            such as edges, is calculated when first accessed
 
         """
         # Defined no of bytes for header and no of faces
         HEADER_SIZE = 80
         COUNT_SIZE = 4
-        # State the data type and length in bytes of the normals and vertices
-        data_type = np.dtype([('normals', np.float32, (3, )),
-                                ('vertices', np.float32, (9, )),
-                                ('atttr', '<i2', (1, ))])
         # Read the header of the STL
         head = data[:HEADER_SIZE].lower()
         # Read the number of faces
         NFaces, = struct.unpack('@i', data[HEADER_SIZE:HEADER_SIZE+COUNT_SIZE])
         # Read the remaining data and save as void, then close file
-        data = np.frombuffer(data[COUNT_SIZE+HEADER_SIZE:], data_type)
+        data = np.frombuffer(data[COUNT_SIZE+HEADER_SIZE:], self._stlRecord)
         # Test if the file is ascii
         if str(head[:5], 'utf-8') == 'solid':
             raise ValueError("ASCII files not supported")
+        self._readRecords(data, NFaces, unify, struc)
+
+    # State the data type and length in bytes of the normals and vertices
+    _stlRecord = np.dtype([('normals', np.float32, (3, )),
+                           ('vertices', np.float32, (9, )),
+                           ('atttr', '<i2', (1, ))])
+
+    def _readRecords(self, data, NFaces, unify=True, struc=True, blocks=False, 
+                     tol=None):
+        r"""
+        Import the vert, faces and norm arrays from an array of binary stl 
+        face records
+        
+        Parameters
+        ----------
+        data: ndarray
+            Array of the stl records, this may be a memory map of the file
+        NFaces: int
+            The number of faces stated in the header of the file
+        unify: boolean, default True
+            unify the coincident vertices of each face
+        struc: boolean, default True
+            Retained for compatibility, the underlying structure of the mesh, 
+            such as edges, is calculated when first accessed
+        blocks: boolean, default False
+            If true, the vertices are unified in blocks of records so the 
+            full array of vertices is never held in memory
+        tol: float, default None
+            Weld tolerance used when unifying the vertices, see unifyVert
+
+        """
         # Write the data to a numpy arrays in AmpObj
-        tfcond = NFaces==data['vertices'].shape[0]			#assigns true or false to tfcond
+        tfcond = NFaces==data.shape[0]			#assigns true or false to tfcond
         if not tfcond:							#if tfcond is false, raise error
             raise ValueError("File is corrupt")							#if true, move on
-        vert = np.resize(np.array(data['vertices']), (NFaces*3, 3))
-        norm = np.array(data['normals'])
-        faces = np.reshape(range(NFaces*3), [NFaces,3])
-        self.faces = faces
-        self.vert = vert
-        self.norm = norm
-        
-        # Call function to unify vertices of the array
-        if unify is True:
-            self.unifyVert()
-        # Call function to calculate the edges array
-#        self.fixNorm()
-        if struc is True:
-            self.calcStruct()
+        if unify is True and blocks is True:
+            self._unifyRecords(data, tol=tol)
+        else:
+            # Single copy of the strided vertex field into a contiguous array
+            self.vert = np.array(data['vertices']).reshape([NFaces*3, 3])
+            self.faces = np.reshape(np.arange(NFaces*3, dtype=np.int32), [NFaces,3])
+            # Call function to unify vertices of the array
+            if unify is True:
+                self.unifyVert(tol)
         self.values = np.zeros([len(self.vert)])
 
+    def _unifyRecords(self, data, chunk=250000, tol=None):
+        r"""
+        Unify the vertices of an array of stl face records block by block. 
+        Each block is unified on its own before the vertices shared between 
+        blocks are unified, giving the same vert and faces arrays as 
+        unifyVert
+        
+        Parameters
+        ----------
+        data: ndarray
+            Array of the stl records, usually a memory map of the file
+        chunk: int, default 250000
+            The number of face records to read in each block
+        tol: float, default None
+            Weld tolerance used when unifying the vertices, see unifyVert
+
+        """
+        NFaces = data.shape[0]
+        faces = np.empty([NFaces, 3], dtype=np.int32)
+        verts = []
+        nVert = 0
+        for i in range(0, NFaces, chunk):
+            vert = np.array(data['vertices'][i:i+chunk]).reshape([-1, 3])
+            vert, indC = weldVert(vert, tol)
+            faces[i:i+chunk, :] = indC.reshape([-1, 3]) + nVert
+            verts.append(vert)
+            nVert += len(vert)
+        # Unify the vertices which appear in more than one block
+        self.vert, indC = weldVert(np.concatenate(verts), tol)
+        indC = indC.astype(np.int32)
+        for i in range(0, NFaces, chunk):
+            faces[i:i+chunk, :] = indC[faces[i:i+chunk, :]]
+        self.faces = faces
+        if tol is not None:
+            self._removeCollapsed()
+
     def read_aop(self, filename, unify=True, struc=True):
         """
         Function to read .aop file from filename and import data into 
@@ -182,7 +390,8 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         filename: str 
             file path of the .stl file to read 
         struc: boolean, default True
-            Calculate the underlying structure of the mesh, such as edges
+            Retained for compatibility, the underlying structure of the mesh, 
+            such as edges, is calculated when first accessed
         
         To access the landmarks use te getLandmarks() methods after the file 
         has been imported
@@ -221,20 +430,15 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             lID += 1
             nPoints = int(lines[lID])
             lID += 1
-            points = np.zeros([nPoints, 3])
-            # For each point in the landmark
-            for j in range(nPoints):
-                r = float(lines[lID])
-                lID += 1
-                theta = np.deg2rad(float(lines[lID]))
-                lID += 1
-                z = float(lines[lID])
-                lID += 1
-                # Convert to cartesian 
-                x = r * np.cos(theta)
-                y = r * np.sin(theta)
-                points[j, :] = [x, y, z]
-            self.landmarks[landName] = points
+            # Each point is given as r, theta and z on consecutive lines
+            points = np.array(lines[lID:lID+3*nPoints], dtype=float)
+            points = points.reshape([nPoints, 3])
+            lID += 3*nPoints
+            # Convert to cartesian 
+            theta = np.deg2rad(points[:, 1])
+            self.landmarks[landName] = np.c_[points[:, 0] * np.cos(theta), 
+                                             points[:, 0] * np.sin(theta), 
+                                             points[:, 2]]
         # file parameters
         # spokes 
         nSpokes = int(lines[lID])
@@ -244,15 +448,12 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         # Create the spokes array
         if spokeDist == 0: 
             # Irregular spacing so read in 
-            spokes = []
-            for i in range(nSpokes):
-                spokes.append(np.deg2rad(float(lines[lID])))
-                lID += 1
-            spokes = np.asarray(spokes)
+            spokes = np.deg2rad(np.array(lines[lID:lID+nSpokes], dtype=float))
+            lID += nSpokes
         else:
             # regular spacing so compute 
             spokes = np.arange(-0.5*np.pi, 1.5*np.pi, spokeDist)
-            spokes = np.flip(spokes)
+            spokes = np.flip(spokes)[:nSpokes]
 
         # slices
         nSlices = int(lines[lID])
@@ -262,62 +463,100 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         # Create the slices array
         if sliceDist == 0: 
             # Irregular spacing so read in 
-            slices = []
-            for i in range(nSlices):
-                slices.append(float(lines[lID]))
-                lID += 1
-            slices = np.asarray(slices)
+            slices = np.array(lines[lID:lID+nSlices], dtype=float)
+            lID += nSlices
         else:
             # regular spacing so compute 
-            slices = np.array([i * sliceDist for i in range(nSlices)])
-
-        # set up the vert and faces arrays 
-        nVerts = nSlices * nSpokes;
-        nFaces = (nSlices - 1) * (nSpokes * 2);
-        self.vert = np.zeros([nVerts, 3], dtype=float)
-        self.faces = np.zeros([nFaces, 3], dtype=int)
-        self.values = np.zeros([len(self.vert)])
-        # Read in the radii as verts
-        for i in range(nSlices):
-            z = slices[i];
-            for j in range(nSpokes):
-                idx = (i * nSpokes) + j;
-                line = lines[lID].split(' ')
-                r = float(line[0])
+            slices = np.arange(nSlices) * sliceDist
+
+        # Read in the radii and optional values of each vertex, given slice 
+        # by slice with one line per spoke
+        nVerts = nSlices * nSpokes
+        radii = lines[lID:lID+nVerts]
+        lID += nVerts
+        self.values = np.zeros([nVerts])
+        try:
+            radii = np.loadtxt(radii, ndmin=2)
+            r = radii[:, 0]
+            if radii.shape[1] > 1:
+                self.values[:] = radii[:, 1]
+        except ValueError:
+            # Missing or unreadable values, so read line by line and set 
+            # these values to zero
+            r = np.zeros([nVerts])
+            for idx, line in enumerate(radii):
+                line = line.split(' ')
+                r[idx] = float(line[0])
                 if len(line) > 1:
                     try: 
                         self.values[idx] = float(line[1])
-                    except:
+                    except ValueError:
                         self.values[idx] = 0
-                theta = spokes[j];
-                x = r * np.cos(theta)
-                y = r * np.sin(theta)
-                self.vert[idx, :] = [x, y, z]
-                lID += 1
-        # Construct faces array 
-        fidx = 0;
-        for sl in range(nSlices - 1):
-            cur_stack_idx = sl * nSpokes;
-            next_stack_idx = (sl + 1) * nSpokes;
-            for sp in range(nSpokes):
-                next_spoke = (sp + 1) % nSpokes;
-                v0 = cur_stack_idx + sp;
-                v1 = cur_stack_idx + next_spoke;
-                v2 = next_stack_idx + next_spoke;
-                v3 = next_stack_idx + sp;
-                self.faces[fidx, :] = [v0, v3, v1];
-                self.faces[fidx + 1, :] = v1, v3, v2;
-                fidx += 2;
+        r = r.reshape([nSlices, nSpokes])
+        self.vert = np.c_[(r * np.cos(spokes)).ravel(), 
+                          (r * np.sin(spokes)).ravel(), 
+                          np.repeat(slices, nSpokes)]
+        # Construct faces array, two faces between each pair of spokes on 
+        # consecutive slices
+        cur = np.arange(nSlices - 1)[:, None] * nSpokes
+        sp = np.arange(nSpokes)[None, :]
+        nxt = (sp + 1) % nSpokes
+        v0 = cur + sp
+        v1 = cur + nxt
+        v2 = cur + nSpokes + nxt
+        v3 = cur + nSpokes + sp
+        self.faces = np.stack([v0, v3, v1, v1, v3, v2], axis=-1).reshape([-1, 3])
         # Call function to unify vertices of the array
-        self.calcStruct()
         if unify is True:
             self.unifyVert()
-        # Call function to calculate the edges array
-#        self.fixNorm()
-        if struc is True:
-            self.calcStruct()
         
         
+    # Magic bytes and alignment of the arrays in the native .ampz format
+    _nativeMagic = b'AMPZ\x01\x00\x00\x00'
+    _nativeAlign = 64
+    _nativeStruct = ['edges', 'edgesFace', 'faceEdges', 'norm', 'vNorm']
+
+    def load_native(self, filename, mmap=True):
+        r"""
+        Function to read a .ampz file saved with save_native. Any structure 
+        of the mesh stored in the file, such as edges, is loaded rather than 
+        recalculated
+        
+        Parameters
+        -----------
+        filename: str 
+            file path of the .ampz file to read 
+        mmap: boolean, default True
+            If true, the arrays are memory mapped copy-on-write from the file 
+            so only the pages which are accessed are read
+
+        """
+        with open(filename, 'rb') as fh:
+            if fh.read(8) != self._nativeMagic:
+                raise ValueError("File is not a native ampscan file")
+            hLen, = struct.unpack('<Q', fh.read(8))
+            header = json.loads(fh.read(hLen).decode('utf-8'))
+            arrays = {}
+            for name, (dtype, shape, offset) in header['arrays'].items():
+                dtype = np.dtype(dtype)
+                if mmap is True and np.prod(shape) > 0:
+                    arrays[name] = np.memmap(filename, dtype=dtype, mode='c', 
+                                             offset=offset, shape=tuple(shape))
+                else:
+                    fh.seek(offset)
+                    arrays[name] = np.fromfile(fh, dtype, int(np.prod(shape)))
+                    arrays[name] = arrays[name].reshape(shape)
+        self.stype = header.get('stype', self.stype)
+        self.vert = arrays.pop('vert')
+        self.faces = arrays.pop('faces')
+        self.values = arrays.pop('values')
+        self.landmarks = {k.split('/', 1)[1]: arrays.pop(k) for k in 
+                          list(arrays) if k.startswith('landmarks/')}
+        # Set the structure after the vert and faces so it is kept
+        for name in self._nativeStruct:
+            if name in arrays:
+                setattr(self, name, arrays.pop(name))
+
     def calcStruct(self, norm=True, edges=True, 
                    edgeFaces=True, faceEdges=True, vNorm=False):
         r"""
@@ -345,12 +584,16 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         """
         if norm is True:
             self.calcNorm()
-        if edges is True:
-            self.calcEdges()
-        if edgeFaces is True:
-            self.calcEdgeFaces()
-        if faceEdges is True:
-            self.calcFaceEdges()
+        if edges is True and edgeFaces is True and faceEdges is True:
+            # All three arrays are built from a single sort of the edges
+            self.calcTopology()
+        else:
+            if edges is True:
+                self.calcEdges()
+            if edgeFaces is True:
+                self.calcEdgeFaces()
+            if faceEdges is True:
+                self.calcFaceEdges()
         if vNorm is True:
             self.calcVNorm()
 
@@ -402,12 +645,19 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         """
         self.landmarks = landmarks
 
-    def unifyVert(self):
+    def unifyVert(self, tol=None):
         r"""
         Function to unify coincident vertices of the mesh to reduce
         size of the vertices array enabling speed increases when performing
         calculations using the vertex array
         
+        Parameters
+        ----------
+        tol: float, default None
+            If given, vertices within the same grid cell of size tol are 
+            merged to their mean position, and any faces which collapse 
+            are removed. Otherwise only exactly coincident vertices are merged
+        
         Examples
         --------
         >>> amp = AmpObject(filename, unify=False)
@@ -418,11 +668,41 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         (7530, 3)
 
         """
-        # Requires numpy 1.13
-        self.vert, indC = np.unique(self.vert, return_inverse=True, axis=0)
+        self.vert, indC = weldVert(self.vert, tol)
         # Maps the new vertices index to the face array
         self.faces = np.resize(indC[self.faces], 
-                               (len(self.norm), 3)).astype(np.int32)
+                               (len(self.faces), 3)).astype(np.int32)
+        if tol is not None:
+            self._removeCollapsed()
+
+    def _removeCollapsed(self):
+        r"""
+        Remove the faces which have collapsed to an edge or a point after 
+        welding vertices with a tolerance
+        """
+        f = self.faces
+        keep = ((f[:, 0] != f[:, 1]) * (f[:, 1] != f[:, 2]) * 
+                (f[:, 0] != f[:, 2]))
+        self.faces = f[keep, :]
+
+    def calcTopology(self):
+        r"""
+        Function to compute the edges, edgesFace and faceEdges arrays 
+        together. Each edge is encoded as a single int64 key so all three 
+        arrays are built from one sort of the edges of the faces
+        
+        Returns
+        -------
+        edges: ndarray
+            Denoting the indicies of two vertices on each edge
+        edgesFace: ndarray
+            Denoting the indicies of the three edges on each face
+        faceEdges: ndarray
+            The indicies of the faces in each edge, edges may have either 
+            1 or 2 faces, if 1 then the second index will be -99999
+
+        """
+        self.edges, self.edgesFace, self.faceEdges = edgeTopology(self.faces)
 
     def calcEdges(self):
         """
@@ -435,11 +715,7 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             Denoting the indicies of two vertices on each edge
 
         """
-        # Get edges array
-        self.edges = np.reshape(self.faces[:, [0, 1, 0, 2, 1, 2]], [-1, 2])
-        self.edges = np.sort(self.edges, 1)
-        # Unify the edges
-        self.edges, indC = np.unique(self.edges, return_inverse=True, axis=0)
+        self.edges = edgeTopology(self.faces)[0]
 
     def calcEdgeFaces(self):
         r"""
@@ -452,14 +728,7 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             Denoting the indicies of the three edges on each face
         
         """
-        edges = np.reshape(self.faces[:, [0, 1, 0, 2, 1, 2]], [-1, 2])
-        edges = np.sort(edges, 1)
-        # Unify the edges
-        edges, indC = np.unique(edges, return_inverse=True, axis=0)
-        # Get edges on each face 
-        self.edgesFace = np.reshape(range(len(self.faces)*3), [-1,3])
-        #Remap the edgesFace array 
-        self.edgesFace = indC[self.edgesFace].astype(np.int32)
+        self.edgesFace = edgeTopology(self.faces)[1]
 
     def calcFaceEdges(self):
         r"""
@@ -469,22 +738,392 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         -------
         faceEdges: ndarray
             The indicies of the faces in each edge, edges may have either 
-            1 or 2 faces, if 1 then the second index will be NaN
+            1 or 2 faces, if 1 then the second index will be -99999
+
+        """
+        self.faceEdges = edgeTopology(self.faces)[2]
+
+    def calcVertAdj(self):
+        r"""
+        Function to compute the adjacency of the vertices, the neighbours of 
+        vertex i are given by vertAdj.indices[vertAdj.indptr[i]:vertAdj.indptr[i+1]]
+        
+        Returns
+        -------
+        vertAdj: scipy.sparse.csr_matrix
+            The [n x n] matrix with a one for each pair of vertices joined 
+            by an edge
+
+        """
+        nV = len(self.vert)
+        e = self.edges
+        self.vertAdj = sparse.csr_matrix(
+            (np.ones(2 * len(e)), (e.ravel(), e[:, ::-1].ravel())), 
+            shape=(nV, nV))
+
+    def calcVertFaces(self):
+        r"""
+        Function to compute the faces connected to each vertex, the faces of 
+        vertex i are given by vertFaces.indices[vertFaces.indptr[i]:vertFaces.indptr[i+1]]
+        
+        Returns
+        -------
+        vertFaces: scipy.sparse.csr_matrix
+            The [n x m] matrix with a one for each face connected to each 
+            vertex
+
+        """
+        f = self.faces
+        fInd = np.repeat(np.arange(len(f)), f.shape[1])
+        self.vertFaces = sparse.csr_matrix(
+            (np.ones(f.size), (f.ravel(), fInd)), 
+            shape=(len(self.vert), len(f)))
+
+    def calcFaceCentroids(self):
+        r"""
+        Function to compute the centroid of each face
+
+        Returns
+        -------
+        faceCentroids: ndarray
+            The [m x 3] array of the mean of the vertices of each face
+
+        """
+        self.faceCentroids = self.vert[self.faces].mean(axis=1)
+
+    def calcVertTree(self):
+        r"""
+        Function to build a KD-tree of the vertices for nearest neighbour 
+        queries, which is kept until the vert array is modified so it can be 
+        shared by alignment, registration and trimming against this mesh
+
+        Returns
+        -------
+        vertTree: scipy.spatial.cKDTree
+            The KD-tree of the vertices
+
+        Examples
+        --------
+        >>> amp = AmpObject(filename)
+        >>> dist, idx = amp.vertTree.query([0, 0, 0])
+
+        """
+        self.vertTree = spatial.cKDTree(self.vert)
+
+    def calcFaceTree(self):
+        r"""
+        Function to build a KD-tree of the face centroids for nearest 
+        neighbour queries, see calcVertTree
+
+        Returns
+        -------
+        faceTree: scipy.spatial.cKDTree
+            The KD-tree of the face centroids
+
+        """
+        self.faceTree = spatial.cKDTree(self.faceCentroids)
+
+    def calcBoundaryLoops(self):
+        r"""
+        Function to compute the ordered loops of vertices around each hole, 
+        or brim, of the mesh. The boundary edges are found from the faces 
+        alone, see _boundaryEdges, so the edges of the mesh are not built. 
+        Each boundary edge is linked to the boundary edge leaving its end 
+        vertex and the loops are ordered by pointer jumping in O(n log n) 
+        vectorised steps
+        
+        Returns
+        -------
+        boundaryLoops: list
+            A list of arrays of the vertex indicies of each loop, ordered in 
+            the direction the edges run in their faces
+
+        """
+        a, b = _boundaryEdges(self.faces)
+        # Match the k-th edge entering each vertex to the k-th leaving it
+        m = len(a)
+        oIn = np.argsort(b, kind='stable')
+        oOut = np.argsort(a, kind='stable')
+        kIn = np.empty(m, dtype=np.int64)
+        kIn[oIn] = b[oIn] * m + groupRank(b[oIn])
+        kOut = a[oOut] * m + groupRank(a[oOut])
+        if m == 0:
+            self.boundaryLoops = []
+            return
+        pos = np.minimum(np.searchsorted(kOut, kIn), m - 1)
+        nxt = np.where(kOut[pos] == kIn, oOut[pos], -1)
+        order, offsets = chainOrder(nxt)
+        self.boundaryLoops = np.split(a[order], offsets[1:-1])
+
+    def getBoundaryLoops(self):
+        r"""
+        Function to return the ordered loops of vertices around each hole, 
+        or brim, of the mesh, see calcBoundaryLoops
+        """
+        return self.boundaryLoops
+
+    def getBoundaryEdges(self):
+        r"""
+        Function to return the boundary edges of the mesh, directed around 
+        each boundary loop in the direction they run in their faces
+        
+        Returns
+        -------
+        a: ndarray
+            The vertex at the start of each edge, as in getBoundaryVert
+        b: ndarray
+            The vertex at the end of each edge
+        hole: ndarray
+            The index of the boundary loop of each edge
+
+        """
+        a = self.getBoundaryVert()
+        n = np.array([len(l) for l in self.boundaryLoops], dtype=np.int64)
+        hole = np.repeat(np.arange(len(n)), n)
+        # The next vertex around each loop
+        start = np.repeat(np.cumsum(n) - n, n)
+        b = a[start + (np.arange(len(a)) - start + 1) % n[hole]]
+        return a, b, hole
+
+    def getBoundaryVert(self):
+        r"""
+        Function to return the indicies of all the vertices on the boundary 
+        loops of the mesh
+        """
+        return np.concatenate([np.zeros(0, dtype=np.int64)] + 
+                              self.boundaryLoops)
+
+    def calcVolumeProfile(self, axis=2):
+        r"""
+        Function to compute the profile of the volume enclosed below each 
+        height in an axis. The holes are closed as in AmpObject.close. The 
+        projected area of each face is spread over its heights as a tent, 
+        so the volume below a height is a piecewise cubic between the 
+        heights of the vertices. The tents are summed in one sweep over the 
+        sorted heights, giving the volume and its derivatives at each 
+        height. The profile is cached until the vert or faces arrays are 
+        modified, see volumeBelow and heightAtVolume
+        
+        Parameters
+        ----------
+        axis: int, default 2
+            The index of the axis
+
+        Returns
+        -------
+        profile: tuple
+            The sorted heights and, just above each, the volume below, the 
+            cross-sectional area and the rate of change of the projected 
+            area of the surface and of its slope
+
+        """
+        name = 'volumeProfile%i' % axis
+        profile = self._getCache(name)
+        if profile is not None:
+            return profile
+        vert = self.vert.astype(float)
+        tri = vert[self.faces]
+        a, b, hole = self.getBoundaryEdges()
+        if len(hole):
+            # Close each hole with a fan of faces to its midpoint
+            midpoint = np.stack([np.bincount(hole, vert[a, i]) 
+                                 for i in range(3)], axis=1)
+            midpoint /= np.bincount(hole)[:, None]
+            tri = np.r_[tri, np.stack([vert[b], vert[a], midpoint[hole]], 
+                                      axis=1)]
+        # The area of each face projected along the axis, signed by normal 
+        i, j = [k for k in range(3) if k != axis]
+        e1 = tri[:, 1] - tri[:, 0]
+        e2 = tri[:, 2] - tri[:, 0]
+        area = 0.5 * (e1[:, i] * e2[:, j] - e1[:, j] * e2[:, i])
+        if axis == 1:
+            area = -area
+        h0, h1, h2 = np.sort(tri[:, :, axis], axis=1).T
+        # Treat heights closer than this as equal
+        tol = 1e-9 * max(np.ptp(vert[:, axis]), 1.0) if len(vert) else 0
+        flat = h2 - h0 <= tol
+        low = (h1 - h0 > tol) & ~flat
+        high = (h2 - h1 > tol) & ~flat
+        # The area spread over the heights as a tent, peaking at h1, each 
+        # change in the value or slope of the tent is an event at a height 
+        peak = np.where(flat, 0, 2 * area / np.where(flat, 1, h2 - h0))
+        sLow = np.where(low, peak / np.where(low, h1 - h0, 1), 0)
+        sHigh = np.where(high, peak / np.where(high, h2 - h1, 1), 0)
+        z = np.r_[h0, h1, h2]
+        jump = np.r_[np.where(~low & ~flat, peak, 0), 
+                     np.where(~high & ~flat, -peak, 0), np.zeros(len(h2))]
+        slope = np.r_[sLow, -sLow - sHigh, sHigh]
+        mass = np.r_[np.where(flat, area, 0), np.zeros(2 * len(h0))]
+        z, ind = np.unique(z, return_inverse=True)
+        ind = ind.ravel()
+        jump, slope, mass = (np.bincount(ind, w, len(z)) 
+                             for w in [jump, slope, mass])
+        # Sweep up the heights, the projected area below each height is the 
+        # negative of the cross-sectional area 
+        dz = np.diff(z)
+        slope = np.cumsum(slope)
+        rho = np.cumsum(jump + np.r_[0, slope[:-1] * dz])
+        csa = -np.cumsum(mass + np.r_[0, rho[:-1] * dz + 
+                                      slope[:-1] * dz**2 / 2])
+        vol = np.cumsum(np.r_[0, csa[:-1] * dz - rho[:-1] * dz**2 / 2 - 
+                              slope[:-1] * dz**3 / 6])
+        profile = (z, vol, csa, rho, slope)
+        self._setCache(name, profile)
+        return profile
+
+    def volumeBelow(self, z, axis=2):
+        r"""
+        Function to return the volume enclosed below each height in an 
+        axis, with the holes closed as in AmpObject.close, from the profile 
+        of calcVolumeProfile
+        
+        Parameters
+        ----------
+        z: float or array_like
+            The heights
+        axis: int, default 2
+            The index of the axis
+
+        Returns
+        -------
+        vol: float or ndarray
+            The volume below each height
+
+        Examples
+        --------
+        >>> amp = AmpObject(filename)
+        >>> vol = amp.volumeBelow([-100, -50, 0])
 
         """
-        #Initiate the faceEdges array
-        self.faceEdges = np.empty([len(self.edges), 2], dtype=np.int32)
-        self.faceEdges.fill(-99999)
-        # Denote the face index for flattened edge array
-        fInd = np.repeat(np.array(range(len(self.faces))), 3)
-        # Flatten edge array
-        eF = np.reshape(self.edgesFace, [-1])
-        eFInd = np.unique(eF, return_index=True)[1]
-        logic = np.zeros([len(eF)], dtype=bool)
-        logic[eFInd] = True
-        self.faceEdges[eF[logic], 0] = fInd[logic]
-        self.faceEdges[eF[~logic], 1] = fInd[~logic]        
+        knots, vol, csa, rho, slope = self.calcVolumeProfile(axis)
+        z = np.asarray(z, dtype=float)
+        k = np.searchsorted(knots, z, side='right') - 1
+        kc = np.clip(k, 0, len(knots) - 1)
+        dz = np.clip(z - knots[kc], 0, None)
+        v = vol[kc] + csa[kc] * dz - rho[kc] * dz**2 / 2 - slope[kc] * dz**3 / 6
+        v = np.where(k < 0, 0.0, np.where(k >= len(knots) - 1, vol[-1], v))
+        return v if v.ndim else float(v)
+
+    def heightAtVolume(self, vol, axis=2):
+        r"""
+        Function to return the height in an axis below which the given 
+        volume is enclosed, the inverse of volumeBelow. The interval is 
+        found from the profile then the height is found by bisection
         
+        Parameters
+        ----------
+        vol: float or array_like
+            The volumes
+        axis: int, default 2
+            The index of the axis
+
+        Returns
+        -------
+        z: float or ndarray
+            The height below which each volume is enclosed
+
+        """
+        knots, profile = self.calcVolumeProfile(axis)[:2]
+        vol = np.asarray(vol, dtype=float)
+        # The volume can only increase, up to rounding
+        k = np.searchsorted(np.maximum.accumulate(profile), vol, side='right')
+        lo = knots[np.clip(k - 1, 0, len(knots) - 1)]
+        hi = knots[np.clip(k, 0, len(knots) - 1)]
+        for i in range(60):
+            mid = (lo + hi) / 2
+            below = self.volumeBelow(mid, axis) < vol
+            lo = np.where(below, mid, lo)
+            hi = np.where(below, hi, mid)
+        z = (lo + hi) / 2
+        return z if z.ndim else float(z)
+
+    def calcEdgeIndex(self, axis=2):
+        r"""
+        Function to compute an index of the interval each edge spans in an 
+        axis, so the edges crossing a plane can be found without checking 
+        every edge. The edges are sorted by their lowest vertex, so only 
+        those starting within the longest span below the plane are checked. 
+        The edges more than four times the median span are kept apart so 
+        they do not widen the search. The index is cached until the vert or 
+        faces arrays are modified
+        
+        Parameters
+        ----------
+        axis: int, default 2
+            The index of the axis
+
+        Returns
+        -------
+        index: tuple
+            The short edges sorted by their lowest vertex with the heights 
+            of their lowest and highest vertices, the longest of their 
+            spans, and the long edges with the heights of their vertices
+
+        """
+        name = 'edgeIndex%i' % axis
+        index = self._getCache(name)
+        if index is not None:
+            return index
+        vE = self.vert[:, axis][self.edges].astype(float)
+        lo = np.minimum(vE[:, 0], vE[:, 1])
+        hi = np.maximum(vE[:, 0], vE[:, 1])
+        span = hi - lo
+        maxSpan = 4 * np.median(span) if len(span) else 0.0
+        isLong = span > maxSpan
+        long = np.flatnonzero(isLong)
+        short = np.flatnonzero(~isLong)
+        short = short[np.argsort(lo[short], kind='stable')]
+        index = (short, lo[short], hi[short], maxSpan, 
+                 long, lo[long], hi[long])
+        self._setCache(name, index)
+        return index
+
+    def getCrossingEdges(self, slices, axis=2):
+        r"""
+        Function to find the edges which cross each of a set of planes, 
+        with one vertex at or below the plane and the other above it, using 
+        the index from calcEdgeIndex. The cost grows with the number of 
+        crossings rather than the size of the mesh
+        
+        Parameters
+        ----------
+        slices: array_like
+            The positions of the planes in the axis
+        axis: int, default 2
+            The index of the axis
+
+        Returns
+        -------
+        edges: ndarray
+            The index of each crossing edge
+        plane: ndarray
+            The index of the plane each edge crosses, sorted by plane and 
+            then edge
+
+        Examples
+        --------
+        >>> amp = AmpObject(filename)
+        >>> edges, plane = amp.getCrossingEdges([-150, -100, -50, 0])
+
+        """
+        short, lo, hi, maxSpan, long, loL, hiL = self.calcEdgeIndex(axis)
+        slices = np.asarray(slices, dtype=float).ravel()
+        # The short edges which start within the longest span of each plane
+        start = np.searchsorted(lo, slices - maxSpan, side='right')
+        n = np.searchsorted(lo, slices, side='right') - start
+        plane = np.repeat(np.arange(len(slices)), n)
+        ind = np.repeat(start - np.cumsum(n) + n, n) + np.arange(n.sum())
+        cross = hi[ind] > slices[plane]
+        edges = short[ind[cross]]
+        plane = plane[cross]
+        # Each long edge crosses the planes between its vertices
+        pOrd = np.argsort(slices, kind='stable')
+        rank = np.searchsorted(slices[pOrd], np.c_[loL, hiL], side='left')
+        lEdges, lPlane = crossPlanes(rank)
+        edges = np.r_[edges, long[lEdges]]
+        plane = np.r_[plane, pOrd[lPlane]]
+        o = np.lexsort([edges, plane])
+        return edges[o], plane[o]
 
     def calcNorm(self):
         r"""
@@ -506,45 +1145,75 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
     
     def fixNorm(self):
         r"""
-        Fix normals of faces so they all face outwards 
-        """
-        fC = self.vert[self.faces].mean(axis=1)
-        cent = self.vert.mean(axis=0)
-        # polarity = np.sum(self.norm * (fC-cent), axis=1) < 0
-        # if polarity.mean() > 0.5:
-        #     self.faces[:, [1,2]] = self.faces[:, [2,1]]
-        #     self.calcNorm()
-        #     if hasattr(self, 'vNorm'): self.calcVNorm()
-        polarity  = np.einsum('ij, ij->i', fC - cent, self.norm) < 0
-        # self.faces[polarity, [1,2]] = self.faces[polarity, [2,1]]
-        for i, f in enumerate(self.faces):
-            if polarity[i] == True:
-                self.faces[i, :] = [f[0], f[2], f[1]]
-
-        self.calcNorm()
-        if hasattr(self, 'vNorm'): self.calcVNorm()
+        Fix normals of faces so they all face outwards. The winding of the 
+        faces is first made consistent over each connected region of the mesh, 
+        then each region is flipped if its signed volume is negative
+        """
+        flip, comp = orientFaces(self.faces, self.edges, self.faceEdges)
+        fv = self.vert[self.faces].astype(float)
+        nComp = comp.max() + 1
+        # Signed volume of each region about its centroid
+        cent = np.stack([np.bincount(comp, fv[:, :, i].mean(axis=1), nComp) 
+                         for i in range(3)], axis=1)
+        cent /= np.bincount(comp, minlength=nComp)[:, None]
+        fv -= cent[comp, None, :]
+        vol = np.einsum('ij, ij->i', fv[:, 0], np.cross(fv[:, 1], fv[:, 2]))
+        vol = np.where(flip, -vol, vol)
+        flip ^= (np.bincount(comp, vol, nComp) < 0)[comp]
+        self.faces[flip, 1:] = self.faces[flip, 2:0:-1]
+        self.markModified(vert=False, faces=True)
         
-    def calcVNorm(self):
+    def calcVNorm(self, weight='mean'):
         """
         Function to compute the vertex normals based upon the mean of the
         connected face normals 
         
+        Parameters
+        ----------
+        weight: str, default 'mean'
+            'mean' takes the mean of the connected face normals, ignoring any 
+            NaN normals of degenerate faces. 'area' weights each face normal by 
+            the area of the face and 'angle' by the angle of the face at the 
+            vertex, these weighted normals are normalised to unit length
+        
         Returns
         -------
         vNorm: ndarray
             normal of each vertex
 
         """
-        f = self.faces.flatten()
-        o_idx = f.argsort()
-        row, col = np.unravel_index(o_idx, self.faces.shape)
-        ndx = np.searchsorted(f[o_idx], range(self.vert.shape[0]), side='right')
-        ndx = np.r_[0, ndx]
-        norms = self.norm[row, :]
-        self.vNorm = np.zeros(self.vert.shape)
-        for i in range(self.vert.shape[0]):
-            self.vNorm[i, :] = np.nanmean(norms[ndx[i]:ndx[i+1], :], axis=0)
-            
+        if weight == 'mean':
+            norms = self.norm
+            valid = ~np.isnan(norms).any(axis=1)
+            norms = np.where(valid[:, None], norms, 0)
+            vNorm = self.vertFaces.dot(norms)
+            count = self.vertFaces.dot(valid.astype(float))
+        elif weight == 'area':
+            # The cross product has magnitude of twice the face area
+            fv = self.vert[self.faces].astype(float)
+            vNorm = self.vertFaces.dot(np.cross(fv[:, 1] - fv[:, 0], 
+                                                fv[:, 2] - fv[:, 0]))
+        elif weight == 'angle':
+            # The angle weight differs for each corner of the face 
+            f = self.faces.flatten()
+            fv = self.vert[self.faces]
+            # Vectors from each corner to the next and previous corner 
+            a = (np.roll(fv, -1, axis=1) - fv).reshape([-1, 3])
+            b = (np.roll(fv, 1, axis=1) - fv).reshape([-1, 3])
+            ang = np.arctan2(np.linalg.norm(np.cross(a, b), axis=1), 
+                             np.einsum('ij, ij->i', a, b))
+            norms = np.nan_to_num(self.norm)
+            w = np.repeat(norms, 3, axis=0) * ang[:, None]
+            vNorm = np.stack([np.bincount(f, w[:, i], len(self.vert)) 
+                              for i in range(3)], axis=1)
+        else:
+            raise ValueError("Expected weight to be 'mean', 'area' or "
+                             "'angle' but found: {}".format(weight))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if weight == 'mean':
+                self.vNorm = vNorm / count[:, None]
+            else:
+                self.vNorm = vNorm / np.linalg.norm(vNorm, axis=1)[:, None]
 
     def save(self, filename):
         r"""
@@ -573,10 +1242,124 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             data_write['vertices'] = np.reshape(fv, (len(self.faces), 9))
             data_write.tofile(fh)
 
+    def save_native(self, filename, struc=True):
+        r"""
+        Function to save the AmpObj as a native .ampz file. The arrays are 
+        stored uncompressed and aligned after a short header so they can be 
+        memory mapped when loaded with load_native. The file is written to a 
+        temporary file which then replaces filename, so a file may be saved 
+        back over the one it was loaded from
+        
+        Parameters
+        -----------
+        filename: str
+            file path of the .ampz file to save to
+        struc: boolean, default True
+            If true, the edges, edgesFace, faceEdges, norm and vNorm arrays 
+            are also stored, calculating them if required
+
+        """
+        self._unmapFile(filename)
+        arrays = {'vert': self.vert, 'faces': self.faces}
+        values = getattr(self, 'values', None)
+        if values is None:
+            values = np.zeros([len(self.vert)])
+        arrays['values'] = values
+        for k, l in self.landmarks.items():
+            arrays['landmarks/' + k] = l
+        if struc is True:
+            for name in self._nativeStruct:
+                arrays[name] = getattr(self, name)
+        arrays = {k: np.ascontiguousarray(a) for k, a in arrays.items()}
+        align = self._nativeAlign
+        # The header length depends on the offsets so pad it to a fixed size
+        index = {k: [a.dtype.str, list(a.shape), 0] for k, a in arrays.items()}
+        hLen = len(json.dumps({'stype': self.stype, 'arrays': index}))
+        hLen += 20 * len(index)
+        offset = -(-(16 + hLen) // align) * align
+        for k, a in arrays.items():
+            index[k][2] = offset
+            offset += -(-a.nbytes // align) * align
+        header = json.dumps({'stype': self.stype, 'arrays': index})
+        header = header.encode('utf-8').ljust(hLen, b' ')
+        tmp = filename + '.tmp'
+        try:
+            with open(tmp, 'wb') as fh:
+                fh.write(self._nativeMagic)
+                fh.write(struct.pack('<Q', hLen))
+                fh.write(header)
+                for k, a in arrays.items():
+                    fh.seek(index[k][2])
+                    a.tofile(fh)
+            os.replace(tmp, filename)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _unmapFile(self, filename):
+        r"""
+        Read into memory any arrays of the AmpObj which are memory mapped from 
+        filename by load_native, so the file can be replaced. The structure 
+        stays cached as the values are unchanged
+        """
+        if not os.path.exists(filename):
+            return
+        def unmap(a):
+            if (isinstance(a, np.memmap) and a.filename is not None and 
+                    os.path.samefile(a.filename, filename)):
+                return np.array(a)
+            return a
+        self._vert = unmap(self._vert)
+        self._faces = unmap(self._faces)
+        if hasattr(self, 'values'):
+            self.values = unmap(self.values)
+        self.landmarks = {k: unmap(l) for k, l in self.landmarks.items()}
+        for k, (faceVersion, vertVersion, a) in self._cache.items():
+            self._cache[k] = (faceVersion, vertVersion, unmap(a))
+
+    def resample_cylindrical(self, slices, spokes, centre=None):
+        r"""
+        Resample the surface onto a cylindrical grid, returning the radius 
+        at each spoke on each slice 
+        
+        Parameters
+        -----------
+        slices: array_like
+            The heights of the slices in the z axis
+        spokes: array_like
+            The angles of the spokes in degrees, between -180 and 360
+        centre: array_like, default None
+            The x and y position of the axis of the cylinder, default is 
+            the origin
+
+        Returns
+        -------
+        r: ndarray
+            The [slices x spokes] array of radii, a slice which does not 
+            intersect the surface is set to NaN
+
+        """
+        return _resamplePolys(self._slicePolys(slices), spokes, centre)
+
+    def _slicePolys(self, slices):
+        r"""
+        Slice the mesh in the z axis, returning one polygon per slice. A 
+        slice which does not intersect the surface gives a single point at 
+        the origin
+        """
+        slices = np.asarray(slices, dtype=float)
+        points, offsets, sliceInd = slice_mesh(self, slices, axis=2)
+        polys = [np.zeros([1, 3])] * len(slices)
+        # Keep the first polygon in each slice
+        for i in np.flatnonzero(np.diff(sliceInd, prepend=-1) != 0):
+            polys[sliceInd[i]] = points[offsets[i]:offsets[i+1]]
+        return polys
+
     def save_aop(self, filename, slices=100, spokes=72, sliceInterval = None, spokeInterval = None, closeEnd = True, centreEnd = True, 
                 side=None, adaptive=False, commments=None, landmarks=False, returnVerts=False):
         r"""
-        Function to save the AmpObj as an aop file 
+        Function to save the AmpObj as an aop file. A ValueError is raised, 
+        and no file written, if any of the slices do not intersect the surface
         
         Parameters
         -----------
@@ -599,7 +1382,8 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             Either 'LEFT', 'RIGHT' or 'NONE' for the side
         adaptive: bool, default False
             If True, this will add slices where there is significant change in perimeter 
-            between consecutive slices
+            between consecutive slices, bisecting each interval with a change above 15% 
+            until the slices are 0.5 mm apart
         comments: str, default None
             Any additional comments to add to the file
         landmarks: dict or bool, default False
@@ -671,13 +1455,10 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             lines.append("%s\n" % landmark)
             nPoints = points.shape[0]
             lines.append("%i\n" % nPoints)
-            for x, y, z in points:
-                r = ((x ** 2) + (y ** 2)) ** 0.5
-                t = np.rad2deg(np.atan2(y, x))
-                z -= minZ
-                lines.append("%f\n" % r)
-                lines.append("%f\n" % t)
-                lines.append("%f\n" % z)
+            r = np.sqrt(points[:, 0]**2 + points[:, 1]**2)
+            t = np.rad2deg(np.arctan2(points[:, 1], points[:, 0]))
+            rtz = np.c_[r, t, points[:, 2] - minZ]
+            lines.append(("%f\n" * rtz.size) % tuple(rtz.ravel()))
         # Write the spokes 
         if isinstance(spokes, int):
             spacing = (360) / spokes
@@ -707,21 +1488,29 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
             minSliceDiff = 0.5
             maxDelta = 0.15
             spacing = 0
-            polys = create_slices(self, slices, typ='slices', axis = 2)
-            csa = calc_perimeter(polys)
-            sliceSpacing = np.diff(slices)
-            delta = np.abs(np.diff(csa) / csa[1:])
+            polys = self._slicePolys(slices)
+            perim = calc_perimeter(polys)
+            # Ignore the slices which miss the surface
+            perim[[len(p) == 1 for p in polys]] = np.nan
             maxiter = 0
-            while (delta > maxDelta).any() and (sliceSpacing > minSliceDiff).all() and maxiter < 10: 
-                
-                idx = np.argmax(delta)
-
-                # insert a new slice
-                slices = np.insert(slices, idx+1, slices[[idx, idx+1]].mean())
-                polys = create_slices(self, slices, typ='slices', axis = 2)
-                csa = calc_perimeter(polys)
-                sliceSpacing = np.diff(slices)
-                delta = np.abs(np.diff(csa) / csa[1:])
+            while maxiter < 50:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    delta = np.abs(np.diff(perim) / perim[1:])
+                    # Bisect all the intervals with a large change in 
+                    # perimeter which are above the minimum spacing
+                    idx = (delta > maxDelta) & (np.diff(slices) > minSliceDiff)
+                idx = np.flatnonzero(idx)
+                if len(idx) == 0:
+                    break
+                # Only slice the new planes and insert them in order
+                newSl = (slices[idx] + slices[idx+1]) / 2
+                newPolys = self._slicePolys(newSl)
+                newPerim = calc_perimeter(newPolys)
+                newPerim[[len(p) == 1 for p in newPolys]] = np.nan
+                slices = np.insert(slices, idx+1, newSl)
+                perim = np.insert(perim, idx+1, newPerim)
+                for i, p in zip(idx + np.arange(1, len(idx)+1), newPolys):
+                    polys.insert(i, p)
                 maxiter += 1
             nSlices = len(slices)
         
@@ -729,46 +1518,24 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         lines.append("%i\n" % (nSlices))
         if spacing == 0:
             lines.append("%i\n" % spacing)
-            for sl in slices:
-                lines.append("%f\n" % (sl - slices[0]))
+            lines.append(("%f\n" * nSlices) % tuple(slices - slices[0]))
         else:   
             lines.append("%f\n" % spacing)
 
-        polys = create_slices(self, slices, typ='slices', axis = 2)
-
-        totPoints = len(spokes) * len(slices)
-        # print(totPoints)
-        vId = 0
-        verts = np.zeros([totPoints, 3])
-
+        # Radii on each slice, the spokes are written in reverse order
+        if adaptive is not True:
+            polys = self._slicePolys(slices)
+        rs = _resamplePolys(polys, spokes, [xShift, yShift])[:, ::-1]
         if closeEnd:
-            polys.pop(0)
-            for i in range(len(spokes)):
-                lines.append("%f\n" % 0)
-                verts[vId, :] = [0, spokes[i], 0]
-                vId += 1
-
-
-        for i, p in enumerate(polys):
-            x = p[:-1, 0] - xShift
-            y = p[:-1, 1] - yShift
-            z = slices[i] - minSl
-            rPoly = ((x ** 2) + (y ** 2)) ** 0.5
-            tPoly = np.rad2deg(np.arctan2(y, x))
-            #  Increase range for interpolation
-            idx = tPoly < 0
-            rPoly = np.append(rPoly, rPoly[idx])
-            tPoly = np.append(tPoly, tPoly[idx] + 360)
-            # Sort by angle
-            idx = np.argsort(tPoly)
-            rPoly = rPoly[idx]
-            tPoly = tPoly[idx]
-            rs = np.interp(spokes, tPoly, rPoly)
-            rs = np.flip(rs)
-            for j, r in enumerate(rs):
-                lines.append("%f\n" % r)
-                verts[vId, :] = [r, spokes[j], z]
-                vId += 1
+            rs[0, :] = 0
+        missed = np.flatnonzero(np.isnan(rs).any(axis=1))
+        if len(missed):
+            raise ValueError("Slices %s at heights %s do not intersect the "
+                             "surface" % (missed.tolist(), 
+                                          np.round(slices[missed], 3).tolist()))
+        lines.append(("%f\n" * rs.size) % tuple(rs.ravel()))
+        verts = np.c_[rs.ravel(), np.tile(spokes, nSlices), 
+                      np.repeat(slices - minSl, nSpokes)]
 
         # lines.append("%f\n" % r)
         with open(filename, 'w') as f:
@@ -795,7 +1562,14 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
         if isinstance(trans, (list, np.ndarray, tuple)):
             # Check that trans has exactly 3 dimensions
             if len(trans) == 3:
+                norm, vNorm = self._getCache('norm'), self._getCache('vNorm')
                 self.vert[:] += trans
+                self.markModified()
+                # The normals are unchanged by a translation
+                if norm is not None:
+                    self.norm = norm
+                if vNorm is not None:
+                    self.vNorm = vNorm
             else:
                 raise ValueError("Translation has incorrect dimensions. Expected 3 but found: " + str(len(trans)))
         else:
@@ -888,11 +1662,15 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
                 raise ValueError("Expected 3x3 array, but found: {}".format(R.shape))
             else:
                 raise ValueError("Expected 3x3 array, but found: 3x"+str(len(R)))
+        norm, vNorm = self._getCache('norm'), self._getCache('vNorm')
         self.vert[:, :] = np.dot(self.vert, R.T)
+        self.markModified()
         if norms is True:
-            self.norm[:, :] = np.dot(self.norm, R.T)
-            if hasattr(self, 'vNorm'):
-                self.vNorm[:, :] = np.dot(self.vNorm, R.T)
+            # Rotate any calculated normals rather than recalculating them
+            if norm is not None:
+                self.norm = np.dot(norm, R.T)
+            if vNorm is not None:
+                self.vNorm = np.dot(vNorm, R.T)
             
             
     def rigidTransform(self, R=None, T=None):
@@ -920,36 +1698,43 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
                 raise TypeError("Expecting array-like translation, but found: "+type(T))
         
     def close(self, overwrite=False):
-        amp = AmpObject({
-            'vert': self.vert.copy(),
-            'faces': self.faces.copy(),
-            'values': self.values.copy(),
-        })
-        amp.calcStruct()
-        # Fill in the holes
-        while (amp.faceEdges == -99999).sum() != 0: 
-            # Find the edges which are only conected to one face
-            edges = (amp.faceEdges == -99999).sum(axis=1).astype(bool)
-            edges = amp.edges[edges, :]
-            # Return the vert indicies for the loop
-            vInd = logEuPath(edges)
-            # Calculate the mmidpoint 
-            midpoint = amp.vert[vInd, :].mean(axis=0)
-            # Add in the new vertex
-            amp.vert = np.r_[amp.vert, midpoint[None, :]]
-            f0 = amp.vert.shape[0] - 1
-            # Add in each face using adjacent vertices in loop
-            for f1, f2 in zip(vInd, np.roll(vInd, 1)):
-                amp.faces = np.r_[amp.faces, [[f1, f0, f2]]]
-            # Update structure and check if any more holes (algorithm keeps going until all holes filled)
-            amp.calcStruct()
+        r"""
+        Fill in all the holes in the surface. Each hole is filled with a fan 
+        of faces from its boundary edges to a new vertex at the mean of its 
+        boundary vertices, with the faces wound consistently with the mesh
+        
+        Parameters
+        ----------
+        overwrite: bool, default False
+            If true, the holes are filled in this AmpObject, otherwise a 
+            closed copy is returned
+
+        Returns
+        -------
+        amp: AmpObject
+            If overwrite is False, the AmpObject with the holes filled in
+
+        """
+        nV = len(self.vert)
+        a, b, hole = self.getBoundaryEdges()
+        nHole = len(self.boundaryLoops)
+        count = np.bincount(hole, minlength=nHole)[:, None]
+        # Add a vertex at the midpoint of each hole and fan the faces to it
+        midpoint = np.stack([np.bincount(hole, self.vert[a, i], nHole) 
+                             for i in range(3)], axis=1) / count
+        faces = np.c_[b, a, nV + hole].astype(self.faces.dtype)
+        vert = np.r_[self.vert, midpoint.astype(self.vert.dtype)]
+        faces = np.r_[self.faces, faces]
+        values = getattr(self, 'values', None)
+        if values is not None and len(values) == nV:
+            values = np.r_[values, np.bincount(hole, values[a], nHole) / 
+                           count[:, 0]]
         if overwrite is True:
-            self.vert = amp.vert
-            self.faces = amp.faces
-            self.calcStruct()
+            self.vert = vert
+            self.faces = faces
+            self.values = values
         else:
-            return amp
-
+            return AmpObject({'vert': vert, 'faces': faces, 'values': values})
 
     @staticmethod
     def rotMatrix(rot, ang='rad'):
@@ -1012,9 +1797,215 @@ class AmpObject(trimMixin, smoothMixin, visMixin):
                 self.vert[:, axis] *= -1.0
                 # Switch face order to normals face same direction
                 self.faces[:, [1, 2]] = self.faces[:, [2, 1]]
-                self.calcNorm()
-                self.calcVNorm()
+                self.markModified(vert=True, faces=True)
             else:
                 raise ValueError("Expected axis to be within range 0-2 but found: {}".format(axis))
         else:
             raise TypeError("Expected axis to be int, but found: {}".format(type(axis)))
+
+
+
+def edgeTopology(faces):
+    r"""
+    Calculate the edges, edgesFace and faceEdges arrays of a mesh from a 
+    single sort. Each edge is encoded as one int64 key, lo * n + hi, so the 
+    sorted keys give the edges in the same order as np.unique(axis=0)
+    
+    Parameters
+    ----------
+    faces: ndarray
+        The [n x 3] array of vertex indicies of each face
+    
+    Returns
+    -------
+    edges: ndarray
+        Denoting the indicies of two vertices on each edge
+    edgesFace: ndarray
+        Denoting the indicies of the three edges on each face
+    faceEdges: ndarray
+        The indicies of the faces in each edge, the first face in the faces 
+        array is given first. If the edge only has one face the second index 
+        will be -99999
+
+    """
+    faces = np.asarray(faces)
+    e = np.reshape(faces[:, [0, 1, 0, 2, 1, 2]], [-1, 2])
+    lo = np.minimum(e[:, 0], e[:, 1]).astype(np.int64)
+    hi = np.maximum(e[:, 0], e[:, 1]).astype(np.int64)
+    n = hi.max() + 1 if len(hi) else 1
+    key = lo * n + hi
+    # Stable sort so the first face in the array is first on each edge
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+    first = np.ones(len(key), dtype=bool)
+    first[1:] = key[1:] != key[:-1]
+    start = np.flatnonzero(first)
+    end = np.append(start[1:], len(key)) - 1
+    # Unique edges in sorted order
+    edges = np.c_[lo[order[start]], hi[order[start]]].astype(faces.dtype)
+    # Map each edge of each face to the index of the unique edge
+    edgesFace = np.empty(len(key), dtype=np.int32)
+    edgesFace[order] = np.cumsum(first) - 1
+    edgesFace = edgesFace.reshape([-1, 3])
+    # The first and last faces on each edge
+    fInd = order // 3
+    faceEdges = np.empty([len(start), 2], dtype=np.int32)
+    faceEdges.fill(-99999)
+    faceEdges[:, 0] = fInd[start]
+    shared = end > start
+    faceEdges[shared, 1] = fInd[end[shared]]
+    return edges, edgesFace, faceEdges
+
+def _resamplePolys(polys, spokes, centre=None):
+    r"""
+    Interpolate the radius of each polygon at each spoke angle, all the 
+    polygons are interpolated in a single call by offsetting their angles
+    
+    Parameters
+    ----------
+    polys: list
+        The closed polygons of each slice, a polygon with fewer than two 
+        points gives a slice of NaN
+    spokes: array_like
+        The angles of the spokes in degrees, between -180 and 360
+    centre: array_like, default None
+        The x and y position of the axis, default is the origin
+
+    Returns
+    -------
+    r: ndarray
+        The [polys x spokes] array of radii
+
+    """
+    spokes = np.asarray(spokes, dtype=float)
+    nSlices, nSpokes = len(polys), len(spokes)
+    if centre is None:
+        centre = [0, 0]
+    # Points of each polygon excluding the repeated first point 
+    n = np.array([len(p) - 1 for p in polys])
+    pts = np.concatenate([p[:-1] for p in polys] + [np.zeros([0, 3])])
+    pInd = np.repeat(np.arange(nSlices), n)
+    x = pts[:, 0] - centre[0]
+    y = pts[:, 1] - centre[1]
+    rPoly = np.sqrt(x**2 + y**2)
+    tPoly = np.rad2deg(np.arctan2(y, x))
+    # Increase range for interpolation
+    idx = tPoly < 0
+    rPoly = np.r_[rPoly, rPoly[idx]]
+    tPoly = np.r_[tPoly, tPoly[idx] + 360]
+    pInd = np.r_[pInd, pInd[idx]]
+    # Offset each polygon so all are sorted and interpolated at once
+    off = np.arange(nSlices) * 1440.0
+    tPoly = tPoly + off[pInd]
+    idx = np.argsort(tPoly, kind='stable')
+    rPoly, tPoly = rPoly[idx], tPoly[idx]
+    first = np.searchsorted(tPoly, off - 720)
+    last = np.searchsorted(tPoly, off + 720) - 1
+    valid = last >= first
+    # Pad each end so the radii outside the angles of a polygon are held 
+    # constant
+    ind = np.c_[first, last + 1][valid].ravel()
+    tPoly = np.insert(tPoly, ind, np.c_[off - 540, off + 720][valid].ravel())
+    rPoly = np.insert(rPoly, ind, np.c_[rPoly[first[valid]], 
+                                        rPoly[last[valid]]].ravel())
+    r = np.interp((spokes[None, :] + off[:, None]).ravel(), tPoly, 
+                  rPoly).reshape([nSlices, nSpokes])
+    r[~valid, :] = np.nan
+    return r
+
+def _boundaryEdges(faces):
+    r"""
+    Return the boundary edges of a mesh, directed the way they run in their 
+    face. The half-edges of the faces are keyed by their vertices, with the 
+    direction in the lowest bit, and sorted once. The edges whose key is not 
+    shared with another half-edge have only one face
+    
+    Parameters
+    ----------
+    faces: ndarray
+        The [n x 3] array of vertex indicies of each face
+    
+    Returns
+    -------
+    a: ndarray
+        The vertex at the start of each boundary edge
+    b: ndarray
+        The vertex at the end of each boundary edge
+
+    Examples
+    --------
+    >>> a, b = _boundaryEdges(np.array([[0, 1, 2], [2, 1, 3]]))
+    >>> a, b
+    (array([0, 2, 1, 3]), array([1, 0, 3, 2]))
+
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.size == 0:
+        return np.zeros([2, 0], dtype=np.int64)
+    n = faces.max() + 1
+    a = faces.ravel()
+    b = np.roll(faces, -1, axis=1).ravel()
+    key = (np.minimum(a, b) * n + np.maximum(a, b)) * 2 + (a > b)
+    key.sort()
+    edge = key >> 1
+    shared = edge[1:] == edge[:-1]
+    single = np.ones(len(key), dtype=bool)
+    single[1:] &= ~shared
+    single[:-1] &= ~shared
+    key = key[single]
+    lo, hi = np.divmod(key >> 1, n)
+    rev = (key & 1).astype(bool)
+    return np.where(rev, hi, lo), np.where(rev, lo, hi)
+
+def _edgeForward(faces, edges, fInd):
+    r"""
+    Return True for each edge which runs from its first to its second vertex 
+    in the winding of the face fInd, ie the second vertex follows the first
+    """
+    fc = faces[fInd]
+    nxt = np.roll(fc, -1, axis=1)
+    return ((fc == edges[:, 0:1]) & (nxt == edges[:, 1:2])).any(axis=1)
+
+def orientFaces(faces, edges, faceEdges):
+    r"""
+    Find the faces to flip so the winding is consistent across each connected 
+    region of the mesh. Each face is split into two nodes, one for each 
+    winding, which are linked across the shared edges so the connected 
+    components of this graph give the orientation of every face at once
+    
+    Parameters
+    ----------
+    faces: ndarray
+        The [n x 3] array of vertex indicies of each face
+    edges: ndarray
+        Denoting the indicies of two vertices on each edge
+    faceEdges: ndarray
+        The indicies of the faces in each edge, -99999 if the edge only has 
+        one face
+    
+    Returns
+    -------
+    flip: ndarray
+        Boolean array, True for the faces to flip
+    comp: ndarray
+        The connected region of each face, labelled from 0
+
+    """
+    nF = len(faces)
+    shared = faceEdges[:, 1] != -99999
+    e = edges[shared]
+    f = faceEdges[shared]
+    fwd = np.stack([_edgeForward(faces, e, f[:, i]) for i in [0, 1]], axis=1)
+    # Consistent neighbours traverse the shared edge in opposite directions
+    other = f[:, 1] + np.where(fwd[:, 0] != fwd[:, 1], 0, nF)
+    row = np.r_[f[:, 0], f[:, 0] + nF]
+    col = np.r_[other, (other + nF) % (2 * nF)]
+    graph = sparse.coo_matrix((np.ones(len(row), dtype=bool), (row, col)), 
+                              shape=(2 * nF, 2 * nF))
+    _, label = connected_components(graph, directed=False)
+    # Keep the winding of the lowest labelled node of each face, faces of 
+    # non-orientable regions have both nodes in the same component
+    flip = label[:nF] > label[nF:]
+    _, comp = np.unique(np.minimum(label[:nF], label[nF:]), 
+                        return_inverse=True)
+    return flip, comp
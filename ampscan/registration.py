@@ -5,7 +5,6 @@ Copyright: Joshua Steer 2020, Joshua.Steer@soton.ac.uk
 """
 import numpy as np
 import copy
-from scipy import spatial
 from ampscan.core import AmpObject
 import matplotlib.pyplot as plt
 
@@ -112,10 +111,9 @@ class registration(object):
             between the target and baseline mesh
 		
         """
-        # Calc FaceCentroids
-        fC = self.t.vert[self.t.faces].mean(axis=1)
-        # Construct knn tree
-        tTree = spatial.cKDTree(fC)
+        # FaceCentroids and their knn tree, cached on the target
+        fC = self.t.faceCentroids
+        tTree = self.t.faceTree
         bData = dict(zip(['vert', 'faces', 'values'], 
                          [self.b.vert, self.b.faces, self.b.values]))
         regData = copy.deepcopy(bData)
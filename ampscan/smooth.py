@@ -6,10 +6,162 @@ Copyright: Joshua Steer 2020, Joshua.Steer@soton.ac.uk
 
 from itertools import count
 import numpy as np
-import copy
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from .utils import findCoincident
 
 class smoothMixin(object):
     
+    def calcUmbrella(self, brim=True):
+        r"""
+        Function to return the umbrella operator of the mesh, a sparse matrix 
+        which replaces each vertex with the mean of its connected neighbours. 
+        The operator is cached until the faces are modified
+
+        Parameters
+        ----------
+        
+        brim: bool, default True
+            If true, then the vertices on the brim are kept fixed
+        
+        Returns
+        -------
+        U: scipy.sparse.csr_matrix
+            The [n x n] operator, the rows of fixed or unconnected vertices 
+            are those of the identity matrix
+        
+        """
+        name = 'umbrellaBrim' if brim is True else 'umbrella'
+        U = self._getCache(name)
+        if U is not None:
+            return U
+        A = self.vertAdj
+        deg = np.diff(A.indptr)
+        fixed = deg == 0
+        if brim is True:
+            fixed[self.getBoundaryVert()] = True
+        # Weight each neighbour by the inverse of the number of neighbours 
+        w = np.where(fixed, 0, 1.0 / np.maximum(deg, 1))
+        U = (sparse.diags(w).dot(A) + sparse.diags(fixed.astype(float))).tocsr()
+        self._setCache(name, U, vert=False)
+        return U
+
+    def calcCotUmbrella(self, brim=True):
+        r"""
+        Function to return the cotangent weighted umbrella operator of the 
+        mesh, replacing each vertex with the mean of its connected neighbours 
+        weighted by the cotangents of the angles opposite each edge. This 
+        depends on the vertices so is recalculated when either the vert or 
+        faces arrays are modified
+
+        Parameters
+        ----------
+        
+        brim: bool, default True
+            If true, then the vertices on the brim are kept fixed
+        
+        Returns
+        -------
+        U: scipy.sparse.csr_matrix
+            The [n x n] operator, the rows of fixed vertices or those without 
+            a positive total weight are those of the identity matrix
+        
+        """
+        name = 'cotUmbrellaBrim' if brim is True else 'cotUmbrella'
+        U = self._getCache(name)
+        if U is not None:
+            return U
+        nV = len(self.vert)
+        fv = self.vert[self.faces].astype(float)
+        row, col, w = [], [], []
+        for k in range(3):
+            i, j = (k + 1) % 3, (k + 2) % 3
+            # Cotangent of the angle at corner k, opposite the edge i-j
+            a = fv[:, i] - fv[:, k]
+            b = fv[:, j] - fv[:, k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cot = (np.einsum('ij, ij->i', a, b) / 
+                       np.linalg.norm(np.cross(a, b), axis=1))
+            cot = 0.5 * np.nan_to_num(cot, posinf=0, neginf=0)
+            row += [self.faces[:, i], self.faces[:, j]]
+            col += [self.faces[:, j], self.faces[:, i]]
+            w += [cot, cot]
+        W = sparse.csr_matrix((np.concatenate(w), (np.concatenate(row), 
+                               np.concatenate(col))), shape=(nV, nV))
+        deg = np.asarray(W.sum(axis=1)).ravel()
+        fixed = ~(deg > 0)
+        if brim is True:
+            fixed[self.getBoundaryVert()] = True
+        w = np.where(fixed, 0, 1.0 / np.where(fixed, 1, deg))
+        U = (sparse.diags(w).dot(W) + sparse.diags(fixed.astype(float))).tocsr()
+        self._setCache(name, U, vert=True)
+        return U
+
+    def calcSmoothSolver(self, lam=1.0, brim=True, cot=False):
+        r"""
+        Function to return the sparse LU factorization of (I + lam*L), where 
+        L is the Laplacian I - U of the umbrella operator U. The factorization 
+        is cached, and may be passed to implicit_smooth of another mesh with 
+        the same faces
+
+        Parameters
+        ----------
+        
+        lam: float, default 1.0
+            The step size of the smoothing
+        brim: bool, default True
+            If true, then the vertices on the brim are kept fixed
+        cot: bool, default False
+            If true, the cotangent weighted umbrella operator is used
+        
+        Returns
+        -------
+        lu: scipy.sparse.linalg.SuperLU
+            The factorization, solve with lu.solve(vert)
+        
+        """
+        key = (lam, brim, cot)
+        cached = self._getCache('smoothSolver')
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if cot is True:
+            U = self.calcCotUmbrella(brim)
+        else:
+            U = self.calcUmbrella(brim)
+        I = sparse.identity(U.shape[0], format='csr')
+        # The sparsity pattern is symmetric, so order for A^T + A which gives 
+        # much less fill than the default ordering
+        lu = splu(((1 + lam) * I - lam * U).tocsc(), 
+                  permc_spec='MMD_AT_PLUS_A')
+        self._setCache('smoothSolver', (key, lu), vert=cot)
+        return lu
+
+    def implicit_smooth(self, lam=1.0, brim=True, cot=False, solver=None):
+        r"""
+        Function to apply an implicit Laplacian smooth to the mesh, solving 
+        (I + lam*L) x = x0 in a single step. This is stable for any lam, with 
+        larger values giving a smoother mesh 
+
+        Parameters
+        ----------
+        
+        lam: float, default 1.0
+            The step size of the smoothing
+        brim: bool, default True
+            If true, then this will not smooth the vertices on the brim
+        cot: bool, default False
+            If true, the Laplacian is weighted by the cotangents of the angles 
+            opposite each edge rather than uniformly 
+        solver: scipy.sparse.linalg.SuperLU, default None
+            A factorization from calcSmoothSolver to reuse, such as that of 
+            another mesh with the same faces
+        
+        """
+        if solver is None:
+            solver = self.calcSmoothSolver(lam, brim, cot)
+        self.vert[:] = solver.solve(np.asarray(self.vert, dtype=float))
+        self.markModified()
+
     def lp_smooth(self, n=1, brim = True):
         r"""
         Function to apply a Laplacian smooth to the mesh. This method replaces 
@@ -20,35 +172,16 @@ class smoothMixin(object):
         
         n: int, default 1
             number of iterations of smoothing
+        brim: bool, default True
+            If true, then this will not smooth the vertices on the brim
         
         """
-        if brim is True:
-            eidx = (self.faceEdges == -99999).sum(axis=1).astype(bool)
-            vBrim = np.unique(self.edges[eidx, :])
-        else: vBrim = []
-        # Flatten the edges array to 1D
-        e = self.edges.flatten()
-        # Get the indicies to sort edges 
-        o_idx = e.argsort()
-        # Get indicies of sorted array where last of each vertex index 
-        # occurs 
-        ndx = np.searchsorted(e[o_idx], np.arange(len(self.vert)), 
-                              side='right')
-        ndx = np.r_[0, ndx]
-        # Map indicies between flatted edges array and standard
-        row, col = np.unravel_index(o_idx, self.edges.shape)
+        U = self.calcUmbrella(brim)
+        vert = self.vert
         for i in np.arange(n):
-            # List all vertices 
-            vert = copy.deepcopy(self.vert)
-            neighVerts = vert[self.edges[row, 1-col], :]
-            vRange = np.arange(self.vert.shape[0])
-            log = np.isin(vRange, vBrim)
-            vRange = vRange[~log]
-            for j in vRange:
-                # Calculate the mean of the vertex set
-                self.vert[j, :] = neighVerts[ndx[j]:ndx[j+1]].mean(axis=0)
-        self.calcNorm()
-        self.calcVNorm()
+            vert = U.dot(vert)
+        self.vert[:] = vert
+        self.markModified()
 
     def hc_smooth(self, n=1 ,beta=0.6, brim=True, norms = True):
         r"""
@@ -66,114 +199,83 @@ class smoothMixin(object):
             If beta=1, then this effectively acts as the Laplacian smooth 
         brim: bool, default True
             If true, then this will not smooth the vertices on the brim
+        norms: bool, default True
+            Retained for compatibility, the normals are recalculated when 
+            next accessed after smoothing
         
         """
-        if brim is True:
-            eidx = (self.faceEdges == -99999).sum(axis=1).astype(bool)
-            vBrim = np.unique(self.edges[eidx, :])
-        else: vBrim = []
-        # Flatten the edges array to 1D
-        e = self.edges.flatten()
-        # Get the indicies to sort edges 
-        o_idx = e.argsort()
-        # Get indicies of sorted array where last of each vertex index 
-        # occurs 
-        ndx = np.searchsorted(e[o_idx], np.arange(len(self.vert)), 
-                              side='right')
-        ndx = np.r_[0, ndx]
-        # Map indicies between flatted edges array and standard
-        row, col = np.unravel_index(o_idx, self.edges.shape)
+        U = self.calcUmbrella(brim)
+        vert = self.vert
         for i in np.arange(n):
-            # List all vertices 
-            vert = copy.deepcopy(self.vert)
-            neighVerts = vert[self.edges[row, 1-col], :]
-            vRange = np.arange(self.vert.shape[0])
-            log = np.isin(vRange, vBrim)
-            vRange = vRange[~log]
-            for j in vRange:
-                # Get the adjacent vertices
-                adj = neighVerts[ndx[j]:ndx[j+1]]
-                # Get the original vertex
-                q = self.vert[j, :]
-                # calculate new Laplacian location 
-                p = adj.mean(axis=0)
-                # Distance between Laplacian and original 
-                b = p - q
-                # Mean distance adjacent between original 
-                d = (adj - q).mean(axis=0)
-                # Based upon beta, get the updated location 
-                self.vert[j, :] = q + beta*b - (1-beta)*d
-        if norms is True:
-            self.calcNorm()
-            self.calcVNorm()
+            # The distance from the original to the Laplacian location, b, and 
+            # the mean distance from the original to the adjacent vertices, 
+            # d, are equal so the update is q + beta*b - (1-beta)*d
+            vert = vert + (2*beta - 1) * (U.dot(vert) - vert)
+        self.vert[:] = vert
+        self.markModified()
     
     def adjustCoincident(self, maxiter = 10, beta = 1):
         r"""
-        Adjust any coincident vertices via a hc smooth
+        Adjust any coincident vertices via a hc smooth. The coincident 
+        vertices are found by hashing with findCoincident, after the first 
+        pass only the vertices which moved are checked again. If no vertices 
+        are coincident, the mesh is not marked as modified
         """
-        e = self.edges.flatten()
-        # Get the indicies to sort edges 
-        o_idx = e.argsort()
-        # Get indicies of sorted array where last of each vertex index 
-        # occurs 
-        ndx = np.searchsorted(e[o_idx], np.arange(len(self.vert)), 
-                              side='right')
-        ndx = np.r_[0, ndx]
-        # Map indicies between flatted edges array and standard
-        row, col = np.unravel_index(o_idx, self.edges.shape)
+        vRange = findCoincident(self.vert)
+        if vRange.size == 0:
+            return
+        U = self.calcUmbrella(brim=False)
         for i in range(maxiter):
-            # List all vertices 
-            vert = copy.deepcopy(self.getVert())
-            neighVerts = vert[self.edges[row, 1-col], :]
-            unq_vert, indC, unq_count = np.unique(vert, return_inverse=True, return_counts=True, axis=0)
-            vert_count = unq_count[indC]
-            vRange = np.arange(vert.shape[0])
-            vRange = vRange[vert_count > 1]
+            # Get the original vertices and their Laplacian locations
+            vert = self.vert
+            q = vert[vRange, :]
+            p = U[vRange, :].dot(vert)
+            # The distance between the Laplacian and original, b, and the mean 
+            # distance between the adjacent and original, d, are equal, so 
+            # the update of q + beta*b - (1-beta)*d simplifies to
+            self.vert[vRange, :] = q + (2*beta - 1) * (p - q)
+            # Vertices which did not move cannot have become coincident with 
+            # each other, so only check those sharing a hash with a moved one
+            vRange = findCoincident(self.vert, moved=vRange)
             if vRange.size == 0:
                 break
-            for j in vRange:
-                # Get the adjacent vertices
-                adj = neighVerts[ndx[j]:ndx[j+1]]
-                # Get the original vertex
-                q = self.vert[j, :]
-                # calculate new Laplacian location 
-                p = adj.mean(axis=0)
-                # Distance between Laplacian and original 
-                b = p - q
-                # Mean distance adjacent between original 
-                d = (adj - q).mean(axis=0)
-                # Based upon beta, get the updated location 
-                self.vert[j, :] = q + beta*b - (1-beta)*d
-        self.calcNorm()
-        self.calcVNorm()
+        self.markModified()
 
-    def smoothValues(self, n=1):
+    def smoothValues(self, n=1, values=None):
         """
         Function to apply a simple Laplacian smooth to the values array. 
         Identical to the vertex smoothing except it applies the smoothing
-        to the values
+        to the values. Multiple fields given as the columns of an [n x k] 
+        array are smoothed together in a single product with the sparse 
+        umbrella operator
 
         Parameters
         ----------
         
         n: int, default 1
             number of iterations of smoothing
+        values: array_like, default None
+            The [n] or [n x k] array of per-vertex fields to smooth, if None 
+            then the values array of the AmpObject is smoothed in place
+        
+        Returns
+        -------
+        values: ndarray
+            The smoothed fields
         
         """
-        # Flatten the edges array to 1D
-        e = self.edges.flatten()
-        # Get the indicies to sort edges 
-        o_idx = e.argsort()
-        # Get indicies of sorted array where last of each vertex index 
-        # occurs 
-        ndx = np.searchsorted(e[o_idx], np.arange(len(self.values)), 
-                              side='right')
-        ndx = np.r_[0, ndx]
-        # Map indicies between flatted edges array and standard
-        row, col = np.unravel_index(o_idx, self.edges.shape)
+        U = self.calcUmbrella(brim=False)
+        if values is None:
+            values = self.values
+            out = values
+        else:
+            values = np.asarray(values)
+            out = np.empty(values.shape, dtype=np.result_type(values, float))
+        if values.shape[0] != U.shape[0]:
+            raise ValueError("Expected values with a row for each of the %i "
+                             "vertices but found %i" % (U.shape[0], 
+                                                        values.shape[0]))
         for i in np.arange(n):
-            neighValues = self.values[self.edges[row, 1-col]]
-            for j in np.arange(self.values.shape[0]):
-                # Calculate mean of values set 
-                self.values[j] = neighValues[ndx[j]:ndx[j+1]].mean()
-            
\ No newline at end of file
+            values = U.dot(values)
+        out[:] = values
+        return out
@@ -7,7 +7,6 @@ Copyright: Joshua Steer 2020, Joshua.Steer@soton.ac.uk
 import numpy as np
 from numbers import Number
 import os
-from scipy import spatial
 import copy
 
 # Used by doc tests
@@ -60,7 +59,6 @@ class trimMixin(object):
             self.faces = vInd[self.faces]
             self.vert = self.vert[~delv, :]
             self.values = self.values[~delv]
-            self.calcStruct()
         else:
             raise TypeError("height arg must be a float")
 
@@ -123,7 +121,6 @@ class trimMixin(object):
         self.faces = vInd[self.faces]
         self.vert = self.vert[~delv, :]
         self.values = self.values[~delv]
-        self.calcStruct()
     
 
     def dynamicTrim(self, s, maxdist = 20):
@@ -145,8 +142,8 @@ class trimMixin(object):
 
         """
         
-        kdTree = spatial.cKDTree(s.vert)
-        fC = self.vert[self.faces].mean(axis=1)
+        kdTree = s.vertTree
+        fC = self.faceCentroids
         [dist, idx] = kdTree.query(fC,1)
         # faceid = np.arange(len(dist))[dist < maxdist]
         # Find the faces with a centroid outside maxdist
@@ -159,4 +156,3 @@ class trimMixin(object):
         # Set the vertices and faces 
         self.faces = vInd[self.faces]
         self.vert = self.vert[keepV, :]
-        self.calcStruct()
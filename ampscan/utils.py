@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Package of vectorised array functions shared by the core and analyse modules
+Copyright: Joshua Steer 2020, Joshua.Steer@soton.ac.uk
+"""
+
+import numpy as np
+
+
+def crossPlanes(rank):
+    r"""
+    Return the pairs of edges and planes where each edge crosses the plane, 
+    from the [n x 2] rank of the vertices of each edge in the sorted planes, 
+    as given by searchsorted with side 'left'. The pairs are returned in 
+    order of the edges
+
+    Examples
+    --------
+    >>> edges, plane = crossPlanes(np.array([[0, 2], [1, 1], [3, 1]]))
+    >>> edges, plane
+    (array([0, 0, 2, 2]), array([0, 1, 1, 2]))
+
+    """
+    i0 = np.minimum(rank[:, 0], rank[:, 1])
+    n = np.maximum(rank[:, 0], rank[:, 1]) - i0
+    cross = np.flatnonzero(n)
+    n = n[cross]
+    edges = np.repeat(cross, n)
+    plane = np.repeat(i0[cross] - np.cumsum(n) + n, n) + np.arange(n.sum())
+    return edges, plane
+
+def groupRank(x):
+    r"""
+    Return the position of each element of a sorted array within its run of 
+    equal values
+
+    Examples
+    --------
+    >>> groupRank(np.array([3, 3, 5, 7, 7, 7]))
+    array([0, 1, 0, 0, 1, 2])
+
+    """
+    idx = np.arange(len(x))
+    first = np.ones(len(x), dtype=bool)
+    first[1:] = x[1:] != x[:-1]
+    return idx - np.maximum.accumulate(np.where(first, idx, 0))
+
+def chainOrder(nxt):
+    r"""
+    Order the nodes of a successor array into its chains and cycles in 
+    O(n log n) vectorised steps, using pointer jumping rather than walking 
+    each node in turn. Each cycle starts from its lowest index node and each 
+    chain from the node with no predecessor
+    
+    Parameters
+    ----------
+    nxt: ndarray
+        The index of the node following each node, -1 for the last node of 
+        a chain. No two nodes may share a successor
+    
+    Returns
+    -------
+    order: ndarray
+        The indicies of the nodes, chain by chain
+    offsets: ndarray
+        The start of each chain in order, with the total number of nodes 
+        appended
+
+    Examples
+    --------
+    >>> order, offsets = chainOrder(np.array([2, -1, 0, 1, 3]))
+    >>> order, offsets
+    (array([4, 3, 1, 0, 2]), array([0, 3, 5]))
+
+    """
+    nxt = np.asarray(nxt)
+    n = len(nxt)
+    idx = np.arange(n)
+    # The last node of each chain points to itself
+    nxt = np.where(nxt < 0, idx, nxt)
+    steps = max(int(n).bit_length(), 1)
+    # Jump along the successors, keeping the lowest index passed, so all 
+    # nodes on a cycle find its lowest node
+    low = idx.copy()
+    ptr = nxt.copy()
+    for i in range(steps):
+        low = np.minimum(low, low[ptr])
+        ptr = ptr[ptr]
+    cycle = nxt[ptr] != ptr
+    # Break each cycle before its lowest node
+    head = cycle & (low == idx)
+    cut = np.flatnonzero(cycle & head[nxt])
+    nxt[cut] = cut
+    # Rank each node by its distance to the end of its chain
+    dist = (nxt != idx).astype(np.int64)
+    ptr = nxt.copy()
+    for i in range(steps):
+        dist += dist[ptr]
+        ptr = ptr[ptr]
+    order = np.lexsort([-dist, ptr])
+    first = np.ones(n, dtype=bool)
+    first[1:] = ptr[order][1:] != ptr[order][:-1]
+    offsets = np.r_[np.flatnonzero(first), n]
+    return order, offsets
+
+def weldVert(vert, tol=None, sort=True):
+    r"""
+    Weld the coincident vertices of an array in near linear time by hashing 
+    the bits of each vertex rather than sorting the array. The output is the 
+    same as np.unique(vert, return_inverse=True, axis=0)
+    
+    Parameters
+    ----------
+    vert: ndarray
+        The [n x 3] array of vertices to weld
+    tol: float, default None
+        If given, the vertices are quantised to a grid of this size and the 
+        vertices in the same grid cell are merged to their mean position. 
+        Vertices either side of a cell boundary are not merged
+    sort: boolean, default True
+        If true, the welded vertices are sorted in the same order as 
+        np.unique, otherwise they are in order of their first occurrence
+    
+    Returns
+    -------
+    unq: ndarray
+        The welded vertices
+    indC: ndarray
+        The index of the welded vertex for each of the input vertices
+
+    Examples
+    --------
+    >>> vert = np.array([[1, 0, 0], [0, 0, 0], [1, 0, 0]], dtype=np.float32)
+    >>> unq, indC = weldVert(vert)
+    >>> indC
+    array([1, 0, 1])
+
+    """
+    vert = np.asarray(vert)
+    if tol is None:
+        keys = _vertKeys(vert)
+    else:
+        keys = np.floor(vert / tol + 0.5).astype(np.int64).view(np.uint64)
+    owner = _hashRows(keys)
+    # The vertex which owns each hash slot represents its group
+    rep = np.flatnonzero(owner == np.arange(len(owner)))
+    ind = np.empty(len(owner), dtype=np.intp)
+    ind[rep] = np.arange(len(rep))
+    indC = ind[owner]
+    if tol is None:
+        unq = vert[rep, :]
+    else:
+        # Merge each group to the mean position of its vertices 
+        count = np.bincount(indC, minlength=len(rep))
+        unq = np.stack([np.bincount(indC, vert[:, i], len(rep)) / count
+                        for i in range(vert.shape[1])], axis=1)
+        unq = unq.astype(vert.dtype)
+    if sort is True:
+        # Only the welded vertices need to be sorted
+        order = np.lexsort(unq.T[::-1])
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order))
+        unq = unq[order, :]
+        indC = rank[indC]
+    return unq, indC
+
+
+def findCoincident(vert, moved=None):
+    r"""
+    Find the vertices which are coincident with at least one other vertex, 
+    by hashing the bits of their coordinates as in weldVert
+    
+    Parameters
+    ----------
+    vert: ndarray
+        The [n x 3] array of vertices
+    moved: array_like, default None
+        If given, only the vertices which share a hash with one of these 
+        vertices are checked, so after moving some of the vertices only 
+        those need to be checked again
+    
+    Returns
+    -------
+    ind: ndarray
+        The indicies of the coincident vertices, in ascending order
+
+    Examples
+    --------
+    >>> vert = np.array([[0, 0, 0], [1, 0, 0], [0, 0, 0], [1, 0, 0], 
+    ...                  [2, 0, 0]], dtype=np.float32)
+    >>> findCoincident(vert)
+    array([0, 1, 2, 3])
+    >>> findCoincident(vert, moved=[1])
+    array([1, 3])
+
+    """
+    keys = _vertKeys(vert)
+    if moved is None:
+        cand = np.arange(len(keys))
+    else:
+        moved = np.asarray(moved, dtype=np.intp)
+        if moved.size == 0:
+            return moved
+        h = _mixKeys(keys)
+        hMoved = np.unique(h[moved])
+        idx = np.minimum(np.searchsorted(hMoved, h), len(hMoved) - 1)
+        cand = np.flatnonzero(hMoved[idx] == h)
+        keys = keys[cand]
+    owner = _hashRows(keys)
+    return cand[np.bincount(owner)[owner] > 1]
+
+def _vertKeys(vert):
+    r"""
+    Return the bits of the coordinates of each vertex packed into uint64 
+    words, so identical vertices have identical keys. A float32 vertex packs 
+    into a 128 bit key of two words and a float64 vertex into three words. 
+    The bits are read in place, so only the keys are allocated
+    """
+    vert = np.asarray(vert)
+    if vert.dtype not in (np.float32, np.float64):
+        vert = vert.astype(float)
+    size = vert.dtype.itemsize
+    bits = np.ascontiguousarray(vert).view('u%i' % size)
+    # -0.0 is only the sign bit, map it to 0.0 so they have the same key
+    negZero = bits.dtype.type(1 << (8 * size - 1))
+    keys = np.zeros([len(bits), -(-bits.shape[1] * size // 8)], 
+                    dtype=np.uint64)
+    for i in range(bits.shape[1]):
+        col = bits[:, i].astype(np.uint64)
+        col[bits[:, i] == negZero] = 0
+        word, shift = divmod(i * size, 8)
+        col <<= np.uint64(8 * shift)
+        keys[:, word] |= col
+    return keys
+
+def _mixKeys(keys):
+    r"""
+    Mix the columns of an [n x m] array of uint64 keys into a 64 bit hash of 
+    each row
+    """
+    h = np.zeros(keys.shape[0], dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for col in keys.T:
+            h ^= col
+            h *= np.uint64(0x9E3779B97F4A7C15)
+            h ^= h >> np.uint64(32)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(29)
+    return h
+
+def _hashRows(keys, chunk=65536):
+    r"""
+    Find identical rows of an array of integer keys using a vectorised open 
+    addressing hash table with linear probing. Each round every unresolved 
+    row claims its slot if the slot is empty, rows which match the key in 
+    their slot are resolved and the rest probe the next slot. The keys of 
+    the unresolved rows are compared in chunks to bound the memory used
+    
+    Parameters
+    ----------
+    keys: ndarray
+        The [n x m] uint64 array of keys
+    chunk: int, default 65536
+        The number of rows to compare at once
+    
+    Returns
+    -------
+    owner: ndarray
+        The index of the row which owns the slot of each row, all identical 
+        rows share the same owner
+
+    """
+    n = keys.shape[0]
+    # Table of at least twice the number of rows to keep probe chains short
+    size = 1 << max(int(2 * n - 1).bit_length(), 1)
+    itype = np.int32 if size < 2**31 else np.int64
+    slot = _mixKeys(keys)
+    slot &= np.uint64(size - 1)
+    slot = slot.astype(itype)
+    table = np.full(size, -1, dtype=itype)
+    owner = np.empty(n, dtype=itype)
+    pend = np.arange(n, dtype=itype)
+    while pend.size:
+        # Claim the empty slots, one row wins each slot
+        empty = table[slot] < 0
+        table[slot[empty]] = pend[empty]
+        # Resolve rows with the same key as the row that owns their slot
+        own = table[slot]
+        match = np.empty(len(pend), dtype=bool)
+        for i in range(0, len(pend), chunk):
+            j = slice(i, i + chunk)
+            match[j] = (keys[own[j]] == keys[pend[j]]).all(axis=1)
+        owner[pend[match]] = own[match]
+        # Probe the next slot for the remaining rows
+        pend = pend[~match]
+        slot = slot[~match]
+        slot += 1
+        slot &= size - 1
+    return owner
@@ -0,0 +1,63 @@
+"""
+Benchmark of AmpObject.adjustCoincident with hashed detection of the 
+coincident vertices against the previous np.unique and loop over each 
+coincident vertex
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_coincident.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from benchutil import tube, timeit
+
+
+def legacy(amp, maxiter=10, beta=1):
+    # The previous adjustCoincident, kept for reference
+    e = amp.edges.flatten()
+    o_idx = e.argsort()
+    ndx = np.searchsorted(e[o_idx], np.arange(len(amp.vert)), side='right')
+    ndx = np.r_[0, ndx]
+    row, col = np.unravel_index(o_idx, amp.edges.shape)
+    for i in range(maxiter):
+        vert = amp.vert.copy()
+        neighVerts = vert[amp.edges[row, 1-col], :]
+        unq_vert, indC, unq_count = np.unique(vert, return_inverse=True, 
+                                              return_counts=True, axis=0)
+        vert_count = unq_count[indC]
+        vRange = np.arange(vert.shape[0])[vert_count > 1]
+        if vRange.size == 0:
+            break
+        for j in vRange:
+            adj = neighVerts[ndx[j]:ndx[j+1]]
+            q = amp.vert[j, :]
+            b = adj.mean(axis=0) - q
+            d = (adj - q).mean(axis=0)
+            amp.vert[j, :] = q + beta*b - (1-beta)*d
+
+
+def mesh(nFaces, nCoincident):
+    vert, faces = tube(nFaces)
+    # Collapse random pairs of vertices onto each other
+    rng = np.random.default_rng(0)
+    ind = rng.choice(len(vert), 2 * nCoincident, replace=False)
+    vert[ind[:nCoincident]] = vert[ind[nCoincident:]]
+    return AmpObject({'vert': vert, 'faces': faces})
+
+
+def main(sizes):
+    print('%10s %12s %12s %12s' % ('faces', 'coincident', 'legacy (s)', 
+                                   'hashed (s)'))
+    for n in sizes:
+        for nC in [10, 1000]:
+            a = mesh(n, nC)
+            b = mesh(n, nC)
+            a.edges, b.edges, b.calcUmbrella(brim=False)
+            t0 = timeit(legacy, a, repeat=1)
+            t1 = timeit(b.adjustCoincident, repeat=1)
+            print('%10i %12i %12.3f %12.3f' % (len(b.faces), 2 * nC, t0, t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000]
+    main(sizes)
@@ -0,0 +1,45 @@
+"""
+Benchmark of the face centroid KD-tree cached on the AmpObject against 
+building it on each call, as align.runICP, registration.point2plane and 
+trimMixin.dynamicTrim did, when registering several scans to one mesh
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_kdtree.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from scipy import spatial
+from ampscan import AmpObject
+from benchutil import tube, timeit
+
+
+def legacy(s, scans):
+    # Build the tree for each scan, kept for reference
+    for m in scans:
+        fC = s.vert[s.faces].mean(axis=1)
+        kdTree = spatial.cKDTree(fC)
+        kdTree.query(m.vert, 1)
+
+
+def cached(s, scans):
+    for m in scans:
+        s.faceTree.query(m.vert, 1)
+
+
+def main(sizes):
+    print('%10s %10s %12s %12s' % ('faces', 'scans', 'legacy (s)', 
+                                   'cached (s)'))
+    for n in sizes:
+        s = AmpObject(dict(zip(['vert', 'faces'], tube(n))))
+        scans = [AmpObject(dict(zip(['vert', 'faces'], 
+                                    tube(n // 10, radius=r)))) 
+                 for r in np.linspace(45, 55, 10)]
+        t0 = timeit(legacy, s, scans, repeat=1)
+        s.markModified()
+        t1 = timeit(cached, s, scans, repeat=1)
+        print('%10i %10i %12.3f %12.3f' % (len(s.faces), len(scans), t0, t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000]
+    main(sizes)
@@ -0,0 +1,68 @@
+"""
+Benchmark of the polygon measurements with analyse.calc_metrics, in one 
+pass over a batch of polygons, against the previous calc_perimeter, 
+calc_widths, calc_csa and est_volume which each looped over the polygons
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_metrics.py [nPolys ...]
+"""
+import sys
+import numpy as np
+from ampscan.analyse import calc_metrics
+from benchutil import timeit
+
+
+def legacy(polys):
+    # The previous loops over each polygon, kept for reference
+    perimeter = np.zeros(len(polys))
+    for i, p in enumerate(polys):
+        d = p[1:, :] - p[:-1, :]
+        perimeter[i] = np.linalg.norm(d, axis=1).sum()
+    ix = np.argmin(polys[0].max(axis=0) - polys[0].min(axis=0))
+    ind = [0,1,2]
+    ind.remove(ix)
+    cor_width = np.zeros(len(polys))
+    sag_width = np.zeros(len(polys))
+    for i, p in enumerate(polys):
+        cor_width[i], sag_width[i] = p[:, ind].max(axis=0) - p[:, ind].min(axis=0)
+    csa = np.zeros(len(polys))
+    for i, p in enumerate(polys):
+        csa[i] = 0.5*np.abs(np.dot(p[:,ind[0]], np.roll(p[:,ind[1]], 1)) -
+                            np.dot(p[:,ind[1]], np.roll(p[:,ind[0]], 1)))
+    d = np.asarray([p[:, ix].mean() for p in polys])
+    vol = np.mean(np.c_[csa[1:], csa[:-1]], axis=1) * np.abs(np.diff(d))
+    return perimeter, cor_width, sag_width, csa, vol.sum()
+
+
+def batch(points, offsets):
+    table = calc_metrics(points, offsets, axis=2)
+    csa = table['csa']
+    vol = ((csa[1:] + csa[:-1]) / 2 * np.abs(np.diff(table['position']))).sum()
+    return table, vol
+
+
+def polygons(nPolys, nPoints=500):
+    # Ellipses of varying size up the limb, closed by repeating the first point
+    rng = np.random.default_rng(0)
+    theta = np.linspace(0, 2*np.pi, nPoints)
+    a, b = rng.uniform(20, 60, [2, nPolys, 1])
+    z = np.repeat(np.linspace(0, 400, nPolys)[:, None], nPoints, axis=1)
+    return list(np.stack([a * np.cos(theta), b * np.sin(theta), z], axis=-1))
+
+
+def main(sizes):
+    print('%10s %10s %12s %12s' % ('polygons', 'points', 'legacy (s)', 
+                                   'batched (s)'))
+    for n in sizes:
+      for nPoints in [100, 500]:
+        polys = polygons(n, nPoints)
+        points = np.concatenate(polys)
+        offsets = np.r_[0, np.cumsum([len(p) for p in polys])]
+        t0 = timeit(legacy, polys)
+        t1 = timeit(batch, points, offsets)
+        print('%10i %10i %12.3f %12.3f' % (n, len(points), t0, t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100, 1000, 10000]
+    main(sizes)
@@ -0,0 +1,59 @@
+"""
+Benchmark of loading a mesh and its structure from the native .ampz format 
+against reading the stl file and calculating the structure
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_native.py [nFaces ...]
+"""
+import os
+import sys
+import tempfile
+from ampscan import AmpObject
+from benchutil import tube, timeit
+
+
+def stl(fh):
+    amp = AmpObject(fh)
+    amp.calcStruct(vNorm=True)
+    return amp
+
+
+def native(fh, mmap=True):
+    amp = AmpObject()
+    amp.load_native(fh, mmap=mmap)
+    # Access the structure so any recalculation is included
+    amp.edges, amp.faceEdges, amp.edgesFace, amp.vNorm
+    return amp
+
+
+def touch(fh):
+    # Memory mapped load followed by reading every array from the file
+    amp = native(fh)
+    for a in [amp.vert, amp.faces, amp.edges, amp.edgesFace, amp.faceEdges, 
+              amp.vNorm]:
+        a.sum()
+
+
+def main(sizes):
+    print('%10s %12s %12s %12s %12s' % ('faces', 'stl (s)', 'ampz (s)', 
+                                        'mmap (s)', 'touch (s)'))
+    d = tempfile.mkdtemp()
+    for n in sizes:
+        vert, faces = tube(n)
+        amp = AmpObject({'vert': vert, 'faces': faces})
+        stlFh = os.path.join(d, 'bench.stl')
+        natFh = os.path.join(d, 'bench.ampz')
+        amp.save(stlFh)
+        stl(stlFh).save_native(natFh)
+        t0 = timeit(stl, stlFh, repeat=1)
+        t1 = timeit(native, natFh, mmap=False)
+        t2 = timeit(native, natFh)
+        t3 = timeit(touch, natFh)
+        print('%10i %12.3f %12.3f %12.4f %12.3f' % (len(faces), t0, t1, t2, t3))
+        os.remove(stlFh)
+        os.remove(natFh)
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+    main(sizes)
@@ -0,0 +1,48 @@
+"""
+Benchmark of a fan of radial slices around the long axis of a tube, taken 
+with the plane normals in analyse.slice_mesh against rotating the mesh for 
+each plane and slicing in an axis
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_oblique.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from ampscan.analyse import create_slices, slice_mesh, fan_planes
+from benchutil import tube, timeit
+
+
+def rotated(amp, angles):
+    # Rotate the mesh so each plane lies across the x axis, then back
+    polys = []
+    for a in np.deg2rad(angles):
+        c, s = np.cos(a), np.sin(a)
+        R = np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]])
+        amp.rotate(R)
+        polys.extend(create_slices(amp, [0], axis=0))
+        amp.rotate(R.T)
+    return polys
+
+
+def fan(amp, angles):
+    normals, slices = fan_planes(angles)
+    return slice_mesh(amp, slices, normal=normals)
+
+
+def main(sizes):
+    angles = np.arange(0, 180, 5)
+    print('%10s %10s %12s %12s' % ('faces', 'planes', 'rotated (s)', 
+                                   'normal (s)'))
+    for n in sizes:
+        amp = AmpObject(dict(zip(['vert', 'faces'], tube(n))))
+        amp.faceEdges
+        t0 = timeit(rotated, amp, angles, repeat=1)
+        t1 = timeit(fan, amp, angles)
+        print('%10i %10i %12.3f %12.3f' % (len(amp.faces), len(angles), 
+                                          t0, t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000]
+    main(sizes)
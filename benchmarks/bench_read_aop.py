@@ -0,0 +1,97 @@
+"""
+Benchmark of reading high resolution aop files with AmpObject.read_aop 
+against the previous line by line reader
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_read_aop.py [spokes slices ...]
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+from ampscan import AmpObject
+from benchutil import timeit
+
+
+def write(fh, nSpokes, nSlices):
+    # Regularly spaced limb-like shape with a value on every vertex
+    z = np.arange(nSlices) * 0.5
+    theta = np.linspace(0, 2*np.pi, nSpokes, endpoint=False)
+    r = 50 + 5 * np.sin(3 * theta)[None, :] - 0.05 * z[:, None]
+    lines = ['AAOP1', 'Benchmark', 'END COMMENTS', 'CYLINDRICAL', 'RIGHT', 
+             '0', str(nSpokes), str(360 / nSpokes), str(nSlices), '0.5']
+    lines += ['%.3f %.3f' % (ri, ri / 10) for ri in r.ravel()]
+    with open(fh, 'w') as f:
+        f.write('\n'.join(lines))
+
+
+def legacy(fh):
+    # The previous reader without landmarks, kept for reference
+    with open(fh, 'r') as f: 
+        lines = f.read().splitlines()
+    lID = 6
+    nSpokes = int(lines[lID])
+    spokeDist = np.deg2rad(float(lines[lID+1]))
+    spokes = np.flip(np.arange(-0.5*np.pi, 1.5*np.pi, spokeDist))
+    nSlices = int(lines[lID+2])
+    sliceDist = float(lines[lID+3])
+    slices = np.array([i * sliceDist for i in range(nSlices)])
+    lID += 4
+    vert = np.zeros([nSlices * nSpokes, 3], dtype=float)
+    faces = np.zeros([(nSlices - 1) * (nSpokes * 2), 3], dtype=int)
+    values = np.zeros([len(vert)])
+    for i in range(nSlices):
+        z = slices[i]
+        for j in range(nSpokes):
+            idx = (i * nSpokes) + j
+            line = lines[lID].split(' ')
+            r = float(line[0])
+            if len(line) > 1:
+                try: 
+                    values[idx] = float(line[1])
+                except:
+                    values[idx] = 0
+            theta = spokes[j]
+            vert[idx, :] = [r * np.cos(theta), r * np.sin(theta), z]
+            lID += 1
+    fidx = 0
+    for sl in range(nSlices - 1):
+        cur_stack_idx = sl * nSpokes
+        next_stack_idx = (sl + 1) * nSpokes
+        for sp in range(nSpokes):
+            next_spoke = (sp + 1) % nSpokes
+            v0 = cur_stack_idx + sp
+            v1 = cur_stack_idx + next_spoke
+            v2 = next_stack_idx + next_spoke
+            v3 = next_stack_idx + sp
+            faces[fidx, :] = [v0, v3, v1]
+            faces[fidx + 1, :] = v1, v3, v2
+            fidx += 2
+    return vert, faces, values
+
+
+def read(fh):
+    amp = AmpObject()
+    amp.read_aop(fh, unify=False)
+    return amp
+
+
+def main(sizes):
+    print('%8s %8s %12s %12s' % ('spokes', 'slices', 'legacy (s)', 'new (s)'))
+    d = tempfile.mkdtemp()
+    for nSpokes, nSlices in sizes:
+        fh = os.path.join(d, 'bench.aop')
+        write(fh, nSpokes, nSlices)
+        vert, faces, values = legacy(fh)
+        amp = read(fh)
+        assert np.allclose(vert, amp.vert) and (faces == amp.faces).all()
+        t0 = timeit(legacy, fh, repeat=1)
+        t1 = timeit(read, fh)
+        print('%8i %8i %12.3f %12.3f' % (nSpokes, nSlices, t0, t1))
+        os.remove(fh)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    sizes = list(zip(args[::2], args[1::2])) or [(72, 100), (360, 500)]
+    main(sizes)
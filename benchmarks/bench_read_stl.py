@@ -0,0 +1,74 @@
+"""
+Benchmark of the peak memory and time of reading a binary stl file with 
+AmpObject.read_stl, comparing reading the records into memory against 
+memory mapping them
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_read_stl.py [nFaces ...]
+"""
+import os
+import sys
+import subprocess
+import tempfile
+import time
+from benchutil import tube, peakRSS, resetPeakRSS, currentRSS
+
+
+def legacy(fh):
+    # The reader prior to the memory mapped mode, kept for reference
+    import struct
+    import numpy as np
+    with open(fh, 'rb') as f:
+        data_type = np.dtype([('normals', np.float32, (3, )),
+                              ('vertices', np.float32, (9, )),
+                              ('atttr', '<i2', (1, ))])
+        f.read(80)
+        NFaces, = struct.unpack('@i', f.read(4))
+        data = np.fromfile(f, data_type)
+    vert = np.resize(np.array(data['vertices']), (NFaces*3, 3))
+    norm = np.array(data['normals'])
+    faces = np.reshape(range(NFaces*3), [NFaces,3])
+    vert, indC = np.unique(vert, return_inverse=True, axis=0)
+    faces = np.resize(indC[faces], (len(norm), 3)).astype(np.int32)
+    return vert, faces
+
+
+def child(fh, mode):
+    # Imports are made before the baseline so only the read is measured
+    from ampscan import AmpObject
+    resetPeakRSS()
+    base = currentRSS()
+    t0 = time.perf_counter()
+    if mode == 'legacy':
+        legacy(fh)
+    else:
+        amp = AmpObject(struc=False)
+        amp.read_stl(fh, unify=True, struc=False, mmap=mode == 'mmap')
+    t = time.perf_counter() - t0
+    print('%f %f' % (t, peakRSS() - base))
+
+
+def main(sizes):
+    from ampscan import AmpObject
+    print('%10s %10s %8s %12s %12s' % ('faces', 'file (MB)', 'mode', 
+                                       'time (s)', 'peak (MB)'))
+    for n in sizes:
+        vert, faces = tube(n)
+        fh = os.path.join(tempfile.mkdtemp(), 'bench.stl')
+        AmpObject({'vert': vert, 'faces': faces}, struc=False).save(fh)
+        size = os.path.getsize(fh) / 1024**2
+        for mode in ('legacy', 'fromfile', 'mmap'):
+            out = subprocess.check_output([sys.executable, __file__, 
+                                           '--child', fh, mode])
+            t, rss = out.split()[-2:]
+            print('%10i %10.1f %8s %12.3f %12.1f' % (len(faces), size, mode, 
+                                                     float(t), float(rss)))
+        os.remove(fh)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+    else:
+        sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000, 5000000]
+        main(sizes)
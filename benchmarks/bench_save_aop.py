@@ -0,0 +1,67 @@
+"""
+Benchmark of AmpObject.save_aop, timing the resampling of the slice 
+polygons onto the spokes and the formatting of the radii against the 
+previous loop over each polygon and radius, along with the slicing and 
+the full save
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_save_aop.py [spokes slices ...]
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+from ampscan import AmpObject
+from ampscan.analyse import create_slices
+from ampscan.core import _resamplePolys
+from benchutil import tube, timeit
+
+
+def legacy(polys, spokes):
+    # The previous interpolation and formatting, kept for reference
+    lines = []
+    for p in polys:
+        x = p[:-1, 0]
+        y = p[:-1, 1]
+        rPoly = ((x ** 2) + (y ** 2)) ** 0.5
+        tPoly = np.rad2deg(np.arctan2(y, x))
+        idx = tPoly < 0
+        rPoly = np.append(rPoly, rPoly[idx])
+        tPoly = np.append(tPoly, tPoly[idx] + 360)
+        idx = np.argsort(tPoly)
+        rs = np.flip(np.interp(spokes, tPoly[idx], rPoly[idx]))
+        for r in rs:
+            lines.append("%f\n" % r)
+    return ''.join(lines)
+
+
+def bulk(polys, spokes):
+    rs = _resamplePolys(polys, spokes)[:, ::-1]
+    return ("%f\n" * rs.size) % tuple(rs.ravel())
+
+
+def main(sizes):
+    print('%8s %8s %12s %12s %12s %12s' % ('spokes', 'slices', 'slice (s)', 
+          'legacy (s)', 'bulk (s)', 'save (s)'))
+    vert, faces = tube(200000)
+    amp = AmpObject({'vert': vert, 'faces': faces})
+    fh = os.path.join(tempfile.mkdtemp(), 'bench.aop')
+    z = amp.vert[:, 2]
+    for nSpokes, nSlices in sizes:
+        slices = np.linspace(z.min() + 1, z.max() - 1, nSlices)
+        spokes = np.arange(-90, 270, 360 / nSpokes)
+        polys = create_slices(amp, slices)
+        t0 = timeit(create_slices, amp, slices, repeat=1)
+        t1 = timeit(legacy, polys, spokes, repeat=1)
+        t2 = timeit(bulk, polys, spokes)
+        t3 = timeit(amp.save_aop, fh, slices=nSlices, spokes=nSpokes, 
+                    repeat=1)
+        print('%8i %8i %12.3f %12.3f %12.3f %12.3f' % (nSpokes, nSlices, t0, 
+                                                       t1, t2, t3))
+    os.remove(fh)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:]]
+    sizes = list(zip(args[::2], args[1::2])) or [(72, 100), (360, 500)]
+    main(sizes)
@@ -0,0 +1,115 @@
+"""
+Benchmark of analyse.create_slices, which now slices all the planes in one 
+pass with slice_mesh, against the previous loop over each plane, and of 
+single plane queries with the cached edge index against checking every edge
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_slices.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from ampscan.analyse import create_slices
+from ampscan.analyse.analyse import planeEdgeIntersect_cy
+from benchutil import tube, timeit
+
+
+def logEuPath(arr):
+    # The previous logEuPath, kept for reference
+    vmax = arr.shape[0]
+    rows = list(range(vmax))
+    order = []
+    i = 0
+    val = arr[i, 0]
+    nmax = vmax-1
+    for n in range(nmax):
+        del rows[i]
+        order.append(val)
+        i=0
+        for x in rows: 
+            if arr[x, 0] == val:
+                val = arr[x, 1]
+                break
+            if arr[x, 1] == val:
+                val = arr[x, 0]
+                break
+            i+=1
+    order.append(val)
+    order = np.asarray(order, dtype=int)
+    return order
+
+
+def legacy(amp, slices, axis=2):
+    # The previous loop over the planes in create_slices, kept for reference
+    vE = amp.vert[:, axis][amp.edges]
+    polys = []
+    for plane in slices:
+        try:
+            ind = vE <= plane
+            validEdgeInd = np.where(np.logical_xor(ind[:,0], ind[:,1]))[0]
+            validfE = amp.faceEdges[validEdgeInd, :].astype(int)
+            faceOrder = logEuPath(validfE)
+            validEdges = amp.edgesFace[faceOrder, :]
+            edges = validEdges[np.isin(validEdges, validEdgeInd)].reshape([-1,2])
+            e = edges.flatten()
+            sortE = []
+            for ed in e:
+                if ed not in sortE:
+                    sortE.append(ed)
+            sortE.append(sortE[0])
+            sortE = np.asarray(sortE)
+            polyEdge = amp.edges[sortE]
+            EdgePoints = np.c_[amp.vert[polyEdge[:,0], :], 
+                                amp.vert[polyEdge[:,1], :]]
+            polys.append(planeEdgeIntersect_cy(EdgePoints, plane, axis))
+        except:
+            continue
+    return polys
+
+
+def scan(amp, plane, axis=2):
+    # The crossing edges found by checking every edge, as each call did 
+    # before the edge index
+    ind = amp.vert[:, axis][amp.edges] <= plane
+    return np.where(np.logical_xor(ind[:,0], ind[:,1]))[0]
+
+
+def queries(func, amp, planes):
+    for plane in planes:
+        func(amp, plane)
+
+
+def main(sizes):
+    print('%10s %10s %12s %12s' % ('faces', 'slices', 'legacy (s)', 
+                                   'batched (s)'))
+    for n in sizes:
+        vert, faces = tube(n)
+        # Shuffle the vertices and faces as in a scan
+        rng = np.random.default_rng(0)
+        perm = rng.permutation(len(vert))
+        vert[perm] = vert.copy()
+        faces = perm[faces][rng.permutation(len(faces))]
+        amp = AmpObject({'vert': vert, 'faces': faces})
+        slices = np.linspace(5, 395, 100)
+        t0 = timeit(legacy, amp, slices, repeat=1)
+        t1 = timeit(create_slices, amp, slices)
+        print('%10i %10i %12.3f %12.3f' % (len(amp.faces), len(slices), 
+                                          t0, t1))
+    print()
+    print('%10s %12s %12s %12s' % ('faces', 'index (s)', 'scan (ms)', 
+                                   'indexed (ms)'))
+    for n in sizes:
+        amp = AmpObject(dict(zip(['vert', 'faces'], tube(n))))
+        amp.edges
+        planes = np.random.default_rng(0).uniform(5, 395, 200)
+        tIndex = timeit(amp.calcEdgeIndex, repeat=1)
+        t0 = timeit(queries, scan, amp, planes) / len(planes)
+        t1 = timeit(queries, lambda a, p: a.getCrossingEdges([p]), amp, 
+                    planes) / len(planes)
+        print('%10i %12.3f %12.3f %12.3f' % (len(amp.faces), tIndex, 
+                                            1e3 * t0, 1e3 * t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000]
+    main(sizes)
@@ -0,0 +1,58 @@
+"""
+Benchmark of lp_smooth and hc_smooth with the sparse umbrella operator 
+against the previous loop over each vertex, along with implicit_smooth 
+with and without the cached factorization
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_smooth.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from benchutil import tube, timeit
+
+
+def legacy(amp, n=1, beta=0.6):
+    # The previous hc_smooth, kept for reference
+    eidx = (amp.faceEdges == -99999).sum(axis=1).astype(bool)
+    vBrim = np.unique(amp.edges[eidx, :])
+    e = amp.edges.flatten()
+    o_idx = e.argsort()
+    ndx = np.searchsorted(e[o_idx], np.arange(len(amp.vert)), side='right')
+    ndx = np.r_[0, ndx]
+    row, col = np.unravel_index(o_idx, amp.edges.shape)
+    for i in np.arange(n):
+        vert = amp.vert.copy()
+        neighVerts = vert[amp.edges[row, 1-col], :]
+        vRange = np.arange(amp.vert.shape[0])
+        vRange = vRange[~np.isin(vRange, vBrim)]
+        for j in vRange:
+            adj = neighVerts[ndx[j]:ndx[j+1]]
+            q = amp.vert[j, :]
+            b = adj.mean(axis=0) - q
+            d = (adj - q).mean(axis=0)
+            amp.vert[j, :] = q + beta*b - (1-beta)*d
+
+
+def main(sizes, n=5):
+    print('%10s %12s %12s %12s %12s %12s %12s' % ('faces', 'legacy (s)', 
+          'operator (s)', 'hc (s)', 'lp (s)', 'factor (s)', 'implicit (s)'))
+    for nF in sizes:
+        vert, faces = tube(nF)
+        amp = AmpObject({'vert': vert, 'faces': faces})
+        amp.edges, amp.faceEdges
+        t0 = timeit(legacy, amp, n, repeat=1)
+        t1 = timeit(lambda: (amp._cache.pop('umbrellaBrim', None), 
+                             amp.calcUmbrella()))
+        t2 = timeit(amp.hc_smooth, n)
+        t3 = timeit(amp.lp_smooth, n)
+        t4 = timeit(lambda: (amp._cache.pop('smoothSolver', None), 
+                             amp.implicit_smooth()), repeat=1)
+        t5 = timeit(amp.implicit_smooth)
+        print('%10i %12.3f %12.3f %12.3f %12.3f %12.3f %12.3f' % 
+              (len(faces), t0, t1, t2, t3, t4, t5))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [10000, 100000]
+    main(sizes)
@@ -0,0 +1,56 @@
+"""
+Benchmark of building the edges, edgesFace and faceEdges arrays with the 
+single sort edgeTopology kernel against the previous three pass code of 
+calcEdges, calcEdgeFaces and calcFaceEdges
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_topology.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan.core import edgeTopology
+from benchutil import tube, timeit
+
+
+def legacy(faces):
+    # calcEdges
+    edges = np.reshape(faces[:, [0, 1, 0, 2, 1, 2]], [-1, 2])
+    edges = np.sort(edges, 1)
+    edges, indC = np.unique(edges, return_inverse=True, axis=0)
+    # calcEdgeFaces
+    e = np.reshape(faces[:, [0, 1, 0, 2, 1, 2]], [-1, 2])
+    e = np.sort(e, 1)
+    e, indC = np.unique(e, return_inverse=True, axis=0)
+    edgesFace = np.reshape(range(len(faces)*3), [-1,3])
+    edgesFace = indC.reshape(-1)[edgesFace].astype(np.int32)
+    # calcFaceEdges
+    faceEdges = np.empty([len(edges), 2], dtype=np.int32)
+    faceEdges.fill(-99999)
+    fInd = np.repeat(np.array(range(len(faces))), 3)
+    eF = np.reshape(edgesFace, [-1])
+    eFInd = np.unique(eF, return_index=True)[1]
+    logic = np.zeros([len(eF)], dtype=bool)
+    logic[eFInd] = True
+    faceEdges[eF[logic], 0] = fInd[logic]
+    faceEdges[eF[~logic], 1] = fInd[~logic]
+    return edges, edgesFace, faceEdges
+
+
+def main(sizes):
+    print('%10s %14s %14s %10s' % ('faces', 'three pass (s)', 'one sort (s)', 
+                                   'speed up'))
+    for n in sizes:
+        vert, faces = tube(n)
+        faces = faces.astype(np.int32)
+        old = legacy(faces)
+        new = edgeTopology(faces)
+        assert all(np.array_equal(a, b) for a, b in zip(old, new))
+        t0 = timeit(legacy, faces, repeat=1)
+        t1 = timeit(edgeTopology, faces)
+        print('%10i %14.3f %14.3f %10.1f' % (len(faces), t0, t1, t0 / t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [10000, 100000, 1000000, 
+                                                      5000000]
+    main(sizes)
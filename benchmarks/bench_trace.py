@@ -0,0 +1,80 @@
+"""
+Benchmark of analyse.traceLoops against the previous logEuPath, which 
+deleted from and rescanned a list of the edges for each step, on the 
+contours of slices through a band of faces
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_trace.py [nEdges ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from ampscan.analyse import traceLoops
+from benchutil import timeit
+
+
+def legacy(arr):
+    # The previous logEuPath, kept for reference
+    vmax = arr.shape[0]
+    rows = list(range(vmax))
+    order = []
+    i = 0
+    val = arr[i, 0]
+    nmax = vmax-1
+    for n in range(nmax):
+        del rows[i]
+        order.append(val)
+        i=0
+        for x in rows: 
+            if arr[x, 0] == val:
+                val = arr[x, 1]
+                break
+            if arr[x, 1] == val:
+                val = arr[x, 0]
+                break
+            i+=1
+    order.append(val)
+    order = np.asarray(order, dtype=int)
+    return order
+
+
+def contour(nEdges, nLoops=1):
+    # The faces either side of each edge crossing the middle of a band of 
+    # faces, shuffled as the vertices and faces of a scan have no order
+    nSpokes = nEdges // (2 * nLoops)
+    theta = np.linspace(0, 2*np.pi, nSpokes, endpoint=False)
+    ring = np.c_[np.cos(theta), np.sin(theta)]
+    vert = np.concatenate([np.c_[ring + 3 * i, np.full(nSpokes, z)] 
+                           for i in range(nLoops) for z in [0, 1]])
+    sp = np.arange(nSpokes)
+    v0 = sp
+    v1 = (sp + 1) % nSpokes
+    faces = np.r_[np.c_[v0, v1, v0 + nSpokes], 
+                  np.c_[v1, v1 + nSpokes, v0 + nSpokes]]
+    faces = np.concatenate([faces + 2 * nSpokes * i for i in range(nLoops)])
+    rng = np.random.default_rng(0)
+    perm = rng.permutation(len(vert))
+    vert[perm] = vert.copy()
+    faces = perm[faces][rng.permutation(len(faces))]
+    amp = AmpObject({'vert': vert, 'faces': faces})
+    vE = amp.vert[:, 2][amp.edges] <= 0.5
+    return amp.faceEdges[np.logical_xor(vE[:, 0], vE[:, 1])]
+
+
+def main(sizes):
+    print('%10s %12s %12s %12s' % ('edges', 'loops', 'legacy (s)', 
+                                   'traced (s)'))
+    for n in sizes:
+        arr = contour(n)
+        t0 = timeit(legacy, arr, repeat=1)
+        t1 = timeit(traceLoops, arr)
+        print('%10i %12i %12.3f %12.4f' % (len(arr), 1, t0, t1))
+        # The legacy path only follows the first loop
+        arr = contour(n, nLoops=10)
+        t1 = timeit(traceLoops, arr)
+        print('%10i %12i %12s %12.4f' % (len(arr), 10, '-', t1))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [1000, 10000, 20000]
+    main(sizes)
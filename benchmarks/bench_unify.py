@@ -0,0 +1,28 @@
+"""
+Benchmark of unifying the vertices of a triangle soup with np.unique 
+against the hash based weldVert
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_unify.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan.core import weldVert
+from benchutil import tube, timeit
+
+
+def main(sizes):
+    print('%10s %14s %14s %14s' % ('faces', 'np.unique (s)', 'weldVert (s)', 
+                                    'tol=1e-3 (s)'))
+    for n in sizes:
+        vert, faces = tube(n)
+        soup = vert[faces].reshape([-1, 3]).astype(np.float32)
+        tu = timeit(np.unique, soup, return_inverse=True, axis=0, repeat=1)
+        tw = timeit(weldVert, soup)
+        tt = timeit(weldVert, soup, 1e-3)
+        print('%10i %14.3f %14.3f %14.3f' % (len(faces), tu, tw, tt))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000, 5000000]
+    main(sizes)
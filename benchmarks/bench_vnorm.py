@@ -0,0 +1,41 @@
+"""
+Benchmark of calculating the vertex normals with the scatter add calcVNorm 
+against the previous per vertex loop
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_vnorm.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from benchutil import tube, timeit
+
+
+def legacy(amp):
+    f = amp.faces.flatten()
+    o_idx = f.argsort()
+    row, col = np.unravel_index(o_idx, amp.faces.shape)
+    ndx = np.searchsorted(f[o_idx], range(amp.vert.shape[0]), side='right')
+    ndx = np.r_[0, ndx]
+    norms = amp.norm[row, :]
+    vNorm = np.zeros(amp.vert.shape)
+    for i in range(amp.vert.shape[0]):
+        vNorm[i, :] = np.nanmean(norms[ndx[i]:ndx[i+1], :], axis=0)
+    return vNorm
+
+
+def main(sizes):
+    print('%10s %10s %10s %10s %10s' % ('faces', 'loop (s)', 'mean (s)', 
+                                        'area (s)', 'angle (s)'))
+    for n in sizes:
+        vert, faces = tube(n)
+        amp = AmpObject({'vert': vert, 'faces': faces})
+        amp.calcNorm()
+        t0 = timeit(legacy, amp, repeat=1)
+        t = [timeit(amp.calcVNorm, w) for w in ['mean', 'area', 'angle']]
+        print('%10i %10.3f %10.3f %10.3f %10.3f' % (len(faces), t0, *t))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+    main(sizes)
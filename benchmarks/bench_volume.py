@@ -0,0 +1,47 @@
+"""
+Benchmark of analyse.calc_volume_closed, which now adds the caps over the 
+holes from their boundary loops, against the previous version which built 
+a closed copy of the mesh with AmpObject.close. Each call is timed from a 
+freshly created mesh, so no structure of the mesh is cached beforehand
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_volume.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from ampscan.analyse import calc_volume_closed
+from benchutil import tube, timeit
+
+
+def legacy(amp_in):
+    # The previous calc_volume_closed, kept for reference
+    amp = amp_in.close()
+    v01 = amp.vert[amp.faces[:, 1], :] - amp.vert[amp.faces[:, 0], :]
+    v02 = amp.vert[amp.faces[:, 2], :] - amp.vert[amp.faces[:, 0], :]
+    cp = np.square(np.cross(v01, v02))
+    area = 0.5 * np.sqrt(cp.sum(axis=1))
+    sVC = area * amp.vert[amp.faces, 2].mean(axis=1) * amp.norm[:, 2]
+    return sVC.sum()
+
+
+def cold(func, vert, faces):
+    return func(AmpObject({'vert': vert, 'faces': faces}))
+
+
+def main(sizes):
+    print('%10s %12s %12s %14s' % ('faces', 'legacy (s)', 'direct (s)', 
+                                   'difference'))
+    for n in sizes:
+        vert, faces = tube(n)
+        v0 = cold(legacy, vert, faces)
+        v1 = cold(calc_volume_closed, vert, faces)
+        t0 = timeit(cold, legacy, vert, faces)
+        t1 = timeit(cold, calc_volume_closed, vert, faces)
+        print('%10i %12.3f %12.3f %14.3e' % (len(faces), t0, t1, 
+                                            abs(v1 - v0) / v0))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000]
+    main(sizes)
@@ -0,0 +1,57 @@
+"""
+Benchmark of the volume matching in align.optZVol, which now uses the 
+cumulative volume profile of each mesh, against the previous slicing of 
+both meshes every 0.5 mm with trapezoidal integration of the areas
+
+Run from the root of the repository with ampscan installed
+Usage: python benchmarks/bench_zvol.py [nFaces ...]
+"""
+import sys
+import numpy as np
+from ampscan import AmpObject
+from ampscan.analyse import create_slices, est_volume, calc_csa
+from benchutil import tube, timeit
+
+
+def legacy(s, m, z0):
+    # The height matching the volume in the previous optZVol, kept for 
+    # reference
+    sMinZ = s.vert[:, 2].min()
+    mMaxZ = m.vert[:, 2].max()
+    sPolys = create_slices(s, [sMinZ + 1, z0], 0.5, typ='real_intervals', axis=2)
+    sVol = est_volume(sPolys)
+    mPolys = create_slices(m, [sMinZ + 1, mMaxZ - 1], 0.5, typ='real_intervals', axis=2)
+    csa = calc_csa(mPolys)
+    d = np.asarray([p[:, 2].mean() for p in mPolys])
+    vol = np.mean(np.c_[csa[1:], csa[:-1]], axis=1) * np.abs(np.diff(d))
+    vol = np.cumsum(np.insert(vol, 0, 0)) - sVol
+    i = np.flatnonzero(vol >= 0)[0]
+    return d[i-1] + (0 - vol[i-1]) / (vol[i] - vol[i-1]) * (d[i] - d[i-1])
+
+
+def profile(s, m, z0):
+    sMinZ = s.vert[:, 2].min()
+    sVol = s.volumeBelow(z0) - s.volumeBelow(sMinZ + 1)
+    return m.heightAtVolume(m.volumeBelow(sMinZ + 1) + sVol)
+
+
+def main(sizes):
+    print('%10s %12s %12s %12s %12s' % ('faces', 'legacy (s)', 'profile (s)', 
+                                        'legacy z', 'profile z'))
+    for n in sizes:
+        s = AmpObject(dict(zip(['vert', 'faces'], tube(n))))
+        vert, faces = tube(n, radius=55.0)
+        m = AmpObject({'vert': vert, 'faces': faces})
+        s.faceEdges, m.faceEdges
+        # The exact height is where the volumes of the two tubes match
+        z0 = 300.0
+        t0 = timeit(legacy, s, m, z0, repeat=1)
+        t1 = timeit(lambda: (s.markModified(), m.markModified(), 
+                             profile(s, m, z0)), repeat=1)
+        print('%10i %12.3f %12.3f %12.4f %12.4f' % (
+            len(s.faces), t0, t1, legacy(s, m, z0), profile(s, m, z0)))
+
+
+if __name__ == '__main__':
+    sizes = [int(float(a)) for a in sys.argv[1:]] or [100000, 1000000]
+    main(sizes)
@@ -0,0 +1,99 @@
+"""
+Common benchmark utilities
+"""
+import time
+import numpy as np
+
+
+def tube(nFaces, radius=50.0, length=400.0):
+    r"""
+    Generate a capped tube mesh, similar in shape to a residual limb scan, 
+    with approximately the requested number of faces
+
+    Parameters
+    ----------
+    nFaces: int
+        Approximate number of faces in the mesh
+    radius: float, default 50.0
+        Radius of the tube
+    length: float, default 400.0
+        Length of the tube along the z axis
+
+    Returns
+    -------
+    vert: ndarray
+        The vertices of the mesh
+    faces: ndarray
+        The faces of the mesh, wound so the normals face outwards
+    """
+    nSpokes = max(int(np.sqrt(nFaces / 2)), 8)
+    nSlices = max(nFaces // (2 * nSpokes), 2)
+    theta = np.linspace(0, 2*np.pi, nSpokes, endpoint=False)
+    z = np.linspace(0, length, nSlices)
+    # Round the distal end so the tube looks more like a limb
+    r = radius * np.sqrt(np.clip(z / (0.2 * length), 0, 1)) + 1e-3
+    vert = np.c_[(r[:, None] * np.cos(theta)).ravel(),
+                 (r[:, None] * np.sin(theta)).ravel(),
+                 np.repeat(z, nSpokes)]
+    sl, sp = np.meshgrid(np.arange(nSlices - 1), np.arange(nSpokes), 
+                         indexing='ij')
+    v0 = (sl * nSpokes + sp).ravel()
+    v1 = (sl * nSpokes + (sp + 1) % nSpokes).ravel()
+    v2 = v1 + nSpokes
+    v3 = v0 + nSpokes
+    faces = np.r_[np.c_[v0, v1, v3], np.c_[v1, v2, v3]]
+    return vert, faces
+
+
+def timeit(func, *args, repeat=3, **kwargs):
+    r"""
+    Return the best wall time in seconds of calling func over a number 
+    of repeats
+    """
+    best = np.inf
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def resetPeakRSS():
+    r"""
+    Reset the peak resident set size of this process, only supported on linux
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peakRSS():
+    r"""
+    Return the peak resident set size of this process in MB
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    import sys
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kB on linux
+    if sys.platform == 'darwin':
+        return rss / 1024**2
+    return rss / 1024
+
+
+def currentRSS():
+    r"""
+    Return the current resident set size of this process in MB
+    """
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS'):
+                return int(line.split()[1]) / 1024
@@ -6,6 +6,7 @@ import unittest
 from util import get_path
 from ampscan import analyse
 import math
+import numpy as np
 
 
 class TestAnalyse(unittest.TestCase):
@@ -45,3 +46,156 @@ class TestAnalyse(unittest.TestCase):
         
         reg = registration(self.amp1, self.amp2).reg
         analyse.generate_spec('output.csv', reg)
+
+    def test_trace_loops(self):
+        """Test that traceLoops orders each of several shuffled loops and 
+        that logEuPath still returns the loop through the first edge"""
+        rng = np.random.default_rng(0)
+        loops = [rng.permutation(50), rng.permutation(30) + 50]
+        arr = np.concatenate([np.c_[l, np.roll(l, -1)] for l in loops])
+        arr = arr[rng.permutation(len(arr))]
+        verts, edges, offsets = analyse.traceLoops(arr)
+        self.assertEqual(len(offsets), 3)
+        self.assertEqual(sorted(np.diff(offsets)), [30, 50])
+        self.assertEqual(sorted(edges), list(range(len(arr))))
+        # Each step runs along its edge to the start of the next step
+        for i in range(2):
+            v = verts[offsets[i]:offsets[i+1]]
+            e = arr[edges[offsets[i]:offsets[i+1]]]
+            step = np.c_[v, np.roll(v, -1)]
+            self.assertTrue((np.sort(step, axis=1) == np.sort(e, axis=1)).all())
+        path = analyse.logEuPath(arr)
+        self.assertEqual(path[0], arr[0, 0])
+        self.assertEqual(path[-1], arr[0, 1])
+        self.assertEqual(len(set(path)), len(path))
+
+    def test_slice_mesh(self):
+        """Test that slice_mesh returns every polygon of every slice and 
+        that create_slices keeps one closed polygon per slice"""
+        from ampscan.core import AmpObject
+        # Two spheres side by side give two polygons per slice
+        amp = self.amp1
+        shifted = amp.vert + [5, 0, 0]
+        both = AmpObject({'vert': np.r_[amp.vert, shifted], 
+                          'faces': np.r_[amp.faces, amp.faces + len(amp.vert)]})
+        slices = [0.5, -0.5, 0.0, 3.0]
+        points, offsets, sliceInd = analyse.slice_mesh(both, slices)
+        self.assertEqual(len(offsets) - 1, 6)
+        self.assertEqual(list(sliceInd), [1, 1, 2, 2, 0, 0])
+        self.assertEqual(offsets[-1], len(points))
+        for i in range(6):
+            p = points[offsets[i]:offsets[i+1]]
+            self.assertTrue((p[0] == p[-1]).all())
+            self.assertTrue(np.allclose(p[:, 2], slices[sliceInd[i]]))
+            # Each polygon lies on the surface of one of the spheres
+            r = np.linalg.norm(p[:, :2] - [5 * (p[0, 0] > 2.5), 0], axis=1)
+            self.assertTrue(np.allclose(r, np.sqrt(1 - slices[sliceInd[i]]**2), 
+                                        atol=0.05))
+        polys = analyse.create_slices(both, slices)
+        self.assertEqual(len(polys), 3)
+        self.assertTrue(np.allclose(polys[0][:, 2], 0.5))
+
+    def test_oblique_slices(self):
+        """Test slicing with oblique planes and a fan of radial planes 
+        through the unit sphere"""
+        amp = self.amp1
+        # A normal along the z axis matches slicing in the axis
+        slices = [-0.5, 0.0, 0.5]
+        points, offsets, sliceInd = analyse.slice_mesh(amp, slices)
+        nPoints, nOffsets, nSliceInd = analyse.slice_mesh(amp, slices, 
+                                                          normal=[0, 0, 2])
+        self.assertTrue((offsets == nOffsets).all())
+        self.assertTrue(np.allclose(points, nPoints, atol=1e-6))
+        n = np.array([1, 1, 1]) / np.sqrt(3)
+        polys = analyse.create_slices(amp, [0.5], normal=n)
+        self.assertTrue(np.allclose(polys[0].dot(n), 0.5, atol=1e-5))
+        r = np.linalg.norm(polys[0] - 0.5 * n, axis=1)
+        self.assertTrue(np.allclose(r, np.sqrt(0.75), atol=0.02))
+        # Each radial plane through the z axis gives a great circle
+        normals, slices = analyse.fan_planes(np.arange(0, 180, 30))
+        self.assertTrue(np.allclose(normals[:, 2], 0))
+        points, offsets, sliceInd = analyse.slice_mesh(amp, slices, 
+                                                       normal=normals)
+        self.assertEqual(sorted(sliceInd), list(range(6)))
+        for i in range(6):
+            p = points[offsets[i]:offsets[i+1]]
+            self.assertTrue(np.allclose(p.dot(normals[sliceInd[i]]), 0, atol=1e-5))
+            self.assertTrue(np.allclose(np.linalg.norm(p, axis=1), 1, atol=0.02))
+
+    def test_calc_metrics(self):
+        """Test the batch measurements of polygons against circles and 
+        ellipses, including an empty and an oblique polygon"""
+        theta = np.linspace(0, 2*np.pi, 721)
+        circle = np.c_[np.cos(theta), np.sin(theta), np.full(721, 2.0)]
+        ellipse = np.c_[3 * np.cos(theta), np.sin(theta), np.full(721, 4.0)]
+        # Tilt the circle about the x axis
+        c, s = np.cos(0.5), np.sin(0.5)
+        tilted = circle.dot(np.array([[1, 0, 0], [0, c, s], [0, -s, c]]))
+        polys = [circle, ellipse, np.zeros([0, 3]), tilted]
+        points = np.concatenate(polys)
+        offsets = np.r_[0, np.cumsum([len(p) for p in polys])]
+        table = analyse.calc_metrics(points, offsets)
+        self.assertEqual(len(table), 4)
+        self.assertTrue(np.allclose(table['csa'], [np.pi, 3*np.pi, 0, np.pi], 
+                                    rtol=1e-4))
+        self.assertAlmostEqual(table['perimeter'][0], 2*np.pi, places=4)
+        self.assertAlmostEqual(table['perimeter'][3], 2*np.pi, places=4)
+        self.assertTrue(np.allclose(table['cor_width'][:2], [2, 6]))
+        self.assertTrue(np.allclose(table['sag_width'][:2], [2, 2]))
+        self.assertTrue(np.allclose(table['position'][:2], [2, 4]))
+        # The list functions agree with the table 
+        polys = [circle, ellipse]
+        self.assertTrue(np.allclose(analyse.calc_csa(polys), table['csa'][:2]))
+        self.assertTrue(np.allclose(analyse.calc_perimeter(polys), 
+                                    table['perimeter'][:2]))
+        self.assertAlmostEqual(analyse.est_volume(polys), 4*np.pi, places=3)
+        # A degenerate apex polygon first does not change the slice axis
+        polys = [np.zeros([3, 3]), circle, ellipse]
+        self.assertAlmostEqual(analyse.est_volume(polys), 5*np.pi, places=3)
+        cor, sag = analyse.calc_widths(polys)
+        self.assertTrue(np.allclose(cor, [0, 2, 6]))
+        self.assertTrue(np.allclose(sag, [0, 2, 2]))
+
+    def test_slice_axis(self):
+        """Test that the widths and volume of slices along the x axis match 
+        those along the z axis of a rotated copy, with the slice axis found 
+        from the polygons"""
+        from ampscan.core import AmpObject
+        amp = AmpObject(get_path("stl_file.stl"))
+        # Rotate so the x axis becomes the z axis
+        rot = AmpObject({'vert': amp.vert[:, [1, 2, 0]], 'faces': amp.faces})
+        polys = analyse.create_slices(amp, [0.05, 0.95], 0.05, 
+                                      typ='norm_intervals', axis=0)
+        rPolys = analyse.create_slices(rot, [0.05, 0.95], 0.05, 
+                                       typ='norm_intervals', axis=2)
+        cor, sag = analyse.calc_widths(polys)
+        rCor, rSag = analyse.calc_widths(rPolys)
+        self.assertGreater(cor.min(), 0)
+        self.assertTrue(np.allclose(cor, rCor))
+        self.assertTrue(np.allclose(sag, rSag))
+        self.assertTrue(np.allclose(analyse.calc_widths(polys, axis=0), 
+                                    [cor, sag]))
+        vol = analyse.est_volume(rPolys)
+        self.assertGreater(vol, 0)
+        self.assertAlmostEqual(analyse.est_volume(polys), vol, delta=1e-6*vol)
+        self.assertAlmostEqual(analyse.est_volume(polys, axis=0), vol, 
+                               delta=1e-6*vol)
+
+    def test_volume_open(self):
+        """Test that the volume of an open surface, with the caps added from 
+        the holes, matches the volume of the closed copy"""
+        from ampscan.core import AmpObject
+        amp = self.amp2
+        keep = np.ones(len(amp.faces), dtype=bool)
+        keep[np.random.default_rng(0).choice(len(keep), 20, replace=False)] = False
+        holes = AmpObject({'vert': amp.vert, 'faces': amp.faces[keep]})
+        vol = analyse.calc_volume_closed(holes)
+        # The edges of the mesh are not built to find the holes
+        self.assertFalse(holes.isCached('edges'))
+        self.assertFalse(holes.isCached('faceEdges'))
+        self.assertEqual(len(holes.getBoundaryLoops()), 20)
+        vol, closed = analyse.calc_volume_closed(holes, return_closed=True)
+        self.assertFalse((closed.faceEdges == -99999).any())
+        self.assertAlmostEqual(vol, analyse.calc_volume_closed(closed), places=5)
+        self.assertAlmostEqual(vol, analyse.calc_volume_closed(amp), 
+                               delta=0.01 * vol)
@@ -191,3 +191,376 @@ class TestCore(unittest.TestCase):
         aop = AmpObject(aop_path)
         aop.save_aop(aop_path[:-4] + '_write.aop')
 
+    def test_read_stl_mmap(self):
+        """Test that memory mapping the stl gives the same mesh as reading it"""
+        from ampscan.core import AmpObject
+        stl_path = get_path("stl_file.stl")
+        amp = AmpObject()
+        amp.read_stl(stl_path, mmap=True)
+        self.assertTrue(np.array_equal(amp.vert, self.amp.vert))
+        self.assertTrue(np.array_equal(amp.faces, self.amp.faces))
+        # Test that blocks smaller than the file unify the same vertices
+        data = np.memmap(stl_path, dtype=amp._stlRecord, mode='r', offset=84)
+        amp._unifyRecords(data, chunk=1000)
+        self.assertTrue(np.array_equal(amp.vert, self.amp.vert))
+        self.assertTrue(np.array_equal(amp.faces, self.amp.faces))
+
+    def test_weld_vert(self):
+        """Test that welding gives the same result as np.unique and merges 
+        vertices within the tolerance"""
+        from ampscan.core import AmpObject, weldVert
+        amp = AmpObject(get_path("stl_file.stl"), unify=False, struc=False)
+        unq, indC = np.unique(amp.vert, return_inverse=True, axis=0)
+        vert, ind = weldVert(amp.vert)
+        self.assertTrue(np.array_equal(unq, vert))
+        self.assertTrue(np.array_equal(indC.reshape(-1), ind))
+        # The float32 vertices are packed into 128 bit keys, with -0.0 and 
+        # 0.0 given the same key
+        from ampscan.utils import _vertKeys
+        self.assertEqual(_vertKeys(amp.vert).shape, (len(amp.vert), 2))
+        self.assertEqual(_vertKeys(amp.vert.astype(float)).shape, 
+                         (len(amp.vert), 3))
+        signed = np.array([[0, 1, 0], [-0.0, 1, 0], [0, 1, -0.0]], 
+                          dtype=np.float32)
+        self.assertTrue((weldVert(signed)[1] == 0).all())
+        # Perturb half the coincident vertices by much less than the tolerance
+        soup = amp.vert.astype(float)
+        soup[::2] += 1e-6
+        vert, ind = weldVert(soup)
+        self.assertGreater(len(vert), len(unq))
+        amp.vert = soup
+        amp.unifyVert(tol=1e-2)
+        # Pairs split by a grid cell boundary are not merged
+        self.assertAlmostEqual(len(amp.vert), len(unq), delta=0.01*len(unq))
+
+    def test_topology(self):
+        """Test that the edges, edgesFace and faceEdges arrays agree"""
+        amp = self.amp
+        amp.calcTopology()
+        # Edges are unique and sorted 
+        self.assertTrue((amp.edges[:, 0] < amp.edges[:, 1]).all())
+        self.assertEqual(len(np.unique(amp.edges, axis=0)), len(amp.edges))
+        # Each edge of a face contains two of the vertices of the face
+        fv = np.sort(amp.faces[:, [0, 1, 0, 2, 1, 2]].reshape([-1, 3, 2]), 2)
+        self.assertTrue(np.array_equal(amp.edges[amp.edgesFace], fv))
+        # Each face listed on an edge contains that edge
+        for i in [0, 1]:
+            valid = amp.faceEdges[:, i] != -99999
+            eF = amp.edgesFace[amp.faceEdges[valid, i]]
+            self.assertTrue((eF == np.flatnonzero(valid)[:, None]).any(axis=1).all())
+
+    def test_lazy_struct(self):
+        """Test that the structure is calculated on access and invalidated 
+        when the vert or faces arrays are modified"""
+        amp = self.amp
+        self.assertFalse(amp.isCached('edges'))
+        self.assertFalse(amp.isCached('norm'))
+        edges = amp.edges
+        norm = amp.norm
+        self.assertTrue(amp.isCached('edges'))
+        self.assertIs(amp.edges, edges)
+        # Moving the vertices only invalidates the normals
+        amp.vert = amp.vert * 2
+        self.assertTrue(amp.isCached('edges'))
+        self.assertFalse(amp.isCached('norm'))
+        # Translation keeps the normals
+        norm = amp.norm
+        amp.translate([1, 0, 0])
+        self.assertIs(amp.norm, norm)
+        # Flipping modifies the faces in place 
+        amp.flip(0)
+        self.assertFalse(amp.isCached('edges'))
+        self.assertFalse(amp.isCached('norm'))
+        amp.calcNorm()
+        self.assertTrue(np.allclose(amp.norm[:, 1:], norm[:, 1:], atol=1e-5, equal_nan=True))
+        self.assertTrue(np.allclose(amp.norm[:, 0], -norm[:, 0], atol=1e-5, equal_nan=True))
+
+    def test_vnorm(self):
+        """Test the vertex normals against the mean of the connected face 
+        normals and that the weighted normals are unit length"""
+        amp = self.amp
+        amp.calcVNorm()
+        for v in [0, 100, 1000]:
+            fInd = (amp.faces == v).any(axis=1)
+            vNorm = np.nanmean(amp.norm[fInd, :], axis=0)
+            self.assertTrue(np.allclose(amp.vNorm[v], vNorm, atol=1e-5))
+        for w in ['area', 'angle']:
+            amp.calcVNorm(w)
+            l = np.linalg.norm(amp.vNorm, axis=1)
+            self.assertTrue(np.allclose(l[~np.isnan(l)], 1))
+        with self.assertRaises(ValueError):
+            amp.calcVNorm('max')
+
+    def test_fix_norm(self):
+        """Test that fixNorm restores the outward winding of randomly flipped 
+        faces"""
+        amp = self.amp
+        faces = amp.faces.copy()
+        flip = np.random.default_rng(0).random(len(faces)) < 0.3
+        amp.faces[flip, 1:] = amp.faces[flip, 2:0:-1]
+        amp.markModified(vert=False, faces=True)
+        amp.fixNorm()
+        self.assertTrue((amp.faces == faces).all())
+        # Consistently inward facing normals are flipped outwards
+        amp.faces = faces[:, [0, 2, 1]]
+        amp.fixNorm()
+        self.assertTrue((amp.faces == faces).all())
+
+    def test_native(self):
+        """Test the round trip of the native .ampz format"""
+        import os
+        from ampscan.core import AmpObject
+        amp = self.amp
+        amp.landmarks = {'tip': np.array([[0, 0, 0], [1, 2, 3.0]])}
+        amp.values = np.arange(len(amp.vert), dtype=float)
+        fname = get_path("Example_native.ampz")
+        amp.save_native(fname)
+        try:
+            for mmap in [True, False]:
+                nat = AmpObject()
+                nat.load_native(fname, mmap=mmap)
+                for k in ['vert', 'faces', 'values']:
+                    self.assertTrue((getattr(nat, k) == getattr(amp, k)).all())
+                self.assertTrue((nat.landmarks['tip'] == amp.landmarks['tip']).all())
+                # The structure is loaded rather than calculated
+                for k in ['edges', 'edgesFace', 'faceEdges', 'vNorm']:
+                    self.assertTrue(nat.isCached(k))
+                    self.assertTrue(np.array_equal(getattr(nat, k), 
+                                                   getattr(amp, k), 
+                                                   equal_nan=True))
+            nat = AmpObject(fname)
+            self.assertEqual(nat.vert.shape, amp.vert.shape)
+            # Modifying the loaded arrays does not modify the file
+            nat.translate([1, 0, 0])
+            chk = AmpObject()
+            chk.load_native(fname, mmap=False)
+            self.assertTrue((chk.vert == amp.vert).all())
+            # Saving back over the file which is memory mapped 
+            nat.save_native(fname)
+            self.assertTrue(nat.isCached('edges'))
+            chk.load_native(fname, mmap=False)
+            self.assertTrue((chk.vert == nat.vert).all())
+            self.assertTrue(np.array_equal(chk.faceEdges, amp.faceEdges))
+            self.assertTrue((chk.landmarks['tip'] == amp.landmarks['tip']).all())
+        finally:
+            # Release the memory maps so the file can be removed on windows
+            nat = None
+            os.remove(fname)
+
+    def test_read_aop(self):
+        """Test the grid of vertices and faces read from an aop file"""
+        from ampscan.core import AmpObject
+        aop = AmpObject()
+        aop.read_aop(get_path("Example.AOP"), unify=False)
+        z = np.unique(aop.vert[:, 2])
+        nSpokes = len(aop.vert) // len(z)
+        self.assertEqual(len(aop.faces), 2 * nSpokes * (len(z) - 1))
+        # Each slice has one vertex per spoke
+        self.assertTrue((np.bincount(np.searchsorted(z, aop.vert[:, 2])) == nSpokes).all())
+        # The faces join consecutive spokes on consecutive slices
+        self.assertTrue(np.isin(np.ptp(aop.faces, axis=1), [1, nSpokes - 1, nSpokes, nSpokes + 1, 2 * nSpokes - 1]).all())
+        self.assertTrue(len(aop.landmarks) > 0)
+
+    def test_resample_cylindrical(self):
+        """Test the radii resampled onto a cylindrical grid against 
+        interpolating each slice on its own"""
+        amp = self.amp
+        z = amp.vert[:, 2]
+        slices = np.linspace(z.min() + 5, z.max() - 5, 10)
+        spokes = np.arange(-90, 270, 10.0)
+        r = amp.resample_cylindrical(slices, spokes)
+        self.assertEqual(r.shape, (10, 36))
+        polys = analyse.create_slices(amp, slices)
+        self.assertEqual(len(polys), 10)
+        for i, p in enumerate(polys):
+            t = np.rad2deg(np.arctan2(p[:-1, 1], p[:-1, 0]))
+            rp = np.linalg.norm(p[:-1, :2], axis=1)
+            neg = t < 0
+            t = np.r_[t, t[neg] + 360]
+            rp = np.r_[rp, rp[neg]]
+            idx = np.argsort(t)
+            self.assertTrue(np.allclose(r[i], np.interp(spokes, t[idx], rp[idx]), atol=1e-4))
+
+    def test_aop_adaptive(self):
+        """Test that adaptive slicing bisects the intervals between the 
+        slices"""
+        import os
+        from ampscan.core import AmpObject
+        fname = get_path("Example_adaptive.aop")
+        verts = self.amp.save_aop(fname, slices=10, closeEnd=False, 
+                                  adaptive=True, returnVerts=True)
+        try:
+            aop = AmpObject(fname, unify=False)
+        finally:
+            os.remove(fname)
+        z = np.unique(verts[:, 2])
+        self.assertTrue(len(z) > 10)
+        self.assertTrue(np.allclose(np.unique(aop.vert[:, 2]), z, atol=1e-5))
+        # Slices are only added by bisecting the intervals
+        halvings = np.log2(np.diff(z).max() / np.diff(z))
+        self.assertTrue(np.allclose(halvings, np.round(halvings)))
+        self.assertTrue((np.diff(z) > 0.25).all())
+
+    def test_aop_missed_slices(self):
+        """Test that an aop file is not written with slices which do not 
+        intersect the surface"""
+        import os
+        from ampscan.core import AmpObject
+        fname = get_path("Example_missed.aop")
+        amp = self.amp
+        # Two copies of the surface with a gap between them
+        totZ = np.ptp(amp.vert[:, 2])
+        vert = np.r_[amp.vert, amp.vert + [0, 0, 2 * totZ]]
+        faces = np.r_[amp.faces, amp.faces + len(amp.vert)]
+        split = AmpObject({'vert': vert, 'faces': faces})
+        with self.assertRaises(ValueError):
+            split.save_aop(fname, sliceInterval=totZ / 10)
+        self.assertFalse(os.path.exists(fname))
+        # Explicit slices beyond the end of the surface
+        minZ = amp.vert[:, 2].min()
+        with self.assertRaises(ValueError):
+            amp.save_aop(fname, slices=minZ + np.linspace(1, 1.5 * totZ, 10))
+        self.assertFalse(os.path.exists(fname))
+
+    def test_vert_adjacency(self):
+        """Test the adjacency of the vertices against the edges and faces and 
+        that it is only recalculated when the faces change"""
+        amp = self.amp
+        A = amp.vertAdj
+        F = amp.vertFaces
+        for i in [0, 100, 1000]:
+            neigh = amp.edges[(amp.edges == i).any(axis=1)]
+            neigh = np.sort(neigh[neigh != i])
+            self.assertTrue(np.array_equal(np.sort(A.indices[A.indptr[i]:A.indptr[i+1]]), neigh))
+            faces = np.flatnonzero((amp.faces == i).any(axis=1))
+            self.assertTrue(np.array_equal(np.sort(F.indices[F.indptr[i]:F.indptr[i+1]]), faces))
+        amp.translate([1, 0, 0])
+        amp.vert = amp.vert * 2
+        self.assertIs(amp.vertAdj, A)
+        amp.faces = amp.faces[:, [0, 2, 1]]
+        self.assertFalse(amp.isCached('vertAdj'))
+        self.assertFalse(amp.isCached('vertFaces'))
+
+    def test_close(self):
+        """Test that close fills in all the holes at once with consistently 
+        wound faces"""
+        from ampscan.core import AmpObject
+        amp = self.amp
+        closed = amp.close()
+        self.assertFalse((closed.faceEdges == -99999).any())
+        self.assertEqual(len(closed.values), len(closed.vert))
+        # Punch more holes in the surface 
+        keep = np.ones(len(amp.faces), dtype=bool)
+        keep[np.random.default_rng(0).choice(len(keep), 50, replace=False)] = False
+        holes = AmpObject({'vert': amp.vert, 'faces': amp.faces[keep]})
+        filled = holes.close()
+        self.assertFalse((filled.faceEdges == -99999).any())
+        # The winding is consistent, so fixNorm does not flip any faces
+        faces = filled.faces.copy()
+        filled.fixNorm()
+        self.assertTrue((filled.faces == faces).all())
+        self.assertAlmostEqual(analyse.calc_volume_closed(holes), 
+                               analyse.calc_volume_closed(amp), delta=0.01*analyse.calc_volume_closed(amp))
+        holes.close(overwrite=True)
+        self.assertEqual(len(holes.faces), len(filled.faces))
+
+    def test_close_volume(self):
+        """Test that the volume of a scan closed by close matches the 
+        estimate from the areas of its slices"""
+        from ampscan.core import AmpObject
+        amp = AmpObject(get_path("stl_file_2.stl"))
+        polys = analyse.create_slices(amp, [0.001, 0.999], 0.001, 
+                                      typ='norm_intervals', axis=2)
+        est = analyse.est_volume(polys)
+        vol = analyse.calc_volume_closed(amp.close())
+        self.assertAlmostEqual(vol, est, delta=0.005*est)
+        self.assertAlmostEqual(analyse.calc_volume_closed(amp), vol, 
+                               delta=1e-6*vol)
+
+    def test_boundary_loops(self):
+        """Test that the boundary loops are ordered around each hole and 
+        cached until the faces change"""
+        from ampscan.core import AmpObject
+        amp = self.amp
+        loops = amp.getBoundaryLoops()
+        self.assertIs(loops, amp.getBoundaryLoops())
+        brim = amp.edges[amp.faceEdges[:, 1] == -99999]
+        self.assertEqual(sum(len(l) for l in loops), len(brim))
+        self.assertEqual(set(amp.getBoundaryVert()), set(brim.ravel()))
+        # Consecutive vertices in each loop share a boundary edge
+        brimSet = set(map(frozenset, brim.tolist()))
+        for l in loops:
+            for a, b in zip(l, np.roll(l, -1)):
+                self.assertIn(frozenset([a, b]), brimSet)
+        # Closing the mesh leaves no loops
+        closed = amp.close()
+        self.assertEqual(closed.getBoundaryLoops(), [])
+        self.assertEqual(len(closed.getBoundaryVert()), 0)
+        # Removing a face adds a loop of three vertices
+        holes = AmpObject({'vert': closed.vert, 'faces': closed.faces[1:]})
+        loops = holes.getBoundaryLoops()
+        self.assertEqual(len(loops), 1)
+        self.assertEqual(set(loops[0]), set(closed.faces[0]))
+
+    def test_crossing_edges(self):
+        """Test that the edges crossing each plane found with the edge index 
+        match a check of every edge and that the index follows changes to 
+        the vertices"""
+        amp = self.amp
+        # Stretch a few edges so they are kept apart as long edges 
+        amp.vert[:5, 2] += 100
+        amp.markModified()
+        rng = np.random.default_rng(0)
+        for axis in range(3):
+            slices = rng.uniform(amp.vert[:, axis].min() - 1, 
+                                 amp.vert[:, axis].max() + 1, 50)
+            edges, plane = amp.getCrossingEdges(slices, axis=axis)
+            vE = amp.vert[:, axis][amp.edges]
+            cross = ((vE.min(axis=1) <= slices[:, None]) & 
+                     (vE.max(axis=1) > slices[:, None]))
+            P, E = np.nonzero(cross)
+            self.assertTrue((edges == E).all() and (plane == P).all())
+        self.assertTrue(len(amp.calcEdgeIndex()[4]) > 0)
+        self.assertTrue(amp.isCached('edgeIndex2'))
+        amp.translate([0, 0, 1])
+        self.assertFalse(amp.isCached('edgeIndex2'))
+
+    def test_volume_profile(self):
+        """Test the volume below each height against the volume of the 
+        closed mesh and the areas of slices, and its inverse"""
+        amp = self.amp
+        vol = analyse.calc_volume_closed(amp)
+        zMin, zMax = amp.vert[:, 2].min(), amp.vert[:, 2].max()
+        self.assertEqual(amp.volumeBelow(zMin - 1), 0)
+        self.assertAlmostEqual(amp.volumeBelow(zMax + 1), vol, delta=1e-6*vol)
+        # The volume between two slices matches the integral of the areas
+        z = np.linspace(-100, -50, 501)
+        csa = analyse.calc_csa(analyse.create_slices(amp, z))
+        self.assertEqual(len(csa), len(z))
+        integral = ((csa[1:] + csa[:-1]) / 2 * np.diff(z)).sum()
+        self.assertAlmostEqual(amp.volumeBelow(-50) - amp.volumeBelow(-100), 
+                               integral, delta=1e-4*integral)
+        v = amp.volumeBelow(z)
+        self.assertTrue((np.diff(v) > 0).all())
+        self.assertTrue(np.allclose(amp.heightAtVolume(v), z, atol=1e-6))
+        # The profile follows changes to the vertices
+        amp.translate([0, 0, 10])
+        self.assertAlmostEqual(amp.volumeBelow(-40), v[-1], delta=1e-6*vol)
+
+    def test_spatial_cache(self):
+        """Test that the face centroids and KD-trees are cached until the 
+        vertices change"""
+        amp = self.amp
+        fC = amp.vert[amp.faces].mean(axis=1)
+        self.assertTrue(np.allclose(amp.faceCentroids, fC))
+        tree = amp.faceTree
+        self.assertIs(tree, amp.faceTree)
+        dist, idx = tree.query(fC[:10])
+        self.assertTrue((idx == np.arange(10)).all())
+        vTree = amp.vertTree
+        self.assertIs(vTree, amp.vertTree)
+        self.assertEqual(vTree.query(amp.vert[5])[0], 0)
+        amp.translate([1, 0, 0])
+        self.assertIsNot(tree, amp.faceTree)
+        self.assertIsNot(vTree, amp.vertTree)
+        self.assertTrue(np.allclose(amp.faceCentroids, fC + [1, 0, 0]))
@@ -62,3 +62,101 @@ class TestSmoothing(unittest.TestCase):
         
         
 
+
+    def test_umbrella(self):
+        """Tests the smoothing operator against the mean of the neighbours 
+        and that the brim is fixed"""
+        amp = self.amp
+        vert = amp.vert.copy()
+        U = amp.calcUmbrella()
+        self.assertIs(amp.calcUmbrella(), U)
+        amp.lp_smooth()
+        eidx = (amp.faceEdges == -99999).any(axis=1)
+        vBrim = np.unique(amp.edges[eidx, :])
+        self.assertTrue(np.array_equal(amp.vert[vBrim], vert[vBrim]))
+        for i in [0, 100, 1000]:
+            if i in vBrim:
+                continue
+            neigh = amp.edges[(amp.edges == i).any(axis=1)]
+            neigh = neigh[neigh != i]
+            self.assertTrue(np.allclose(amp.vert[i], vert[neigh].mean(axis=0), atol=1e-4))
+        # The operator is kept when the vertices move but not the faces
+        self.assertIs(amp.calcUmbrella(), U)
+        amp.faces = amp.faces[:, [0, 2, 1]]
+        self.assertIsNot(amp.calcUmbrella(), U)
+
+    def test_implicit_smooth(self):
+        """Tests that the implicit smooth solves the backward Euler step, 
+        keeping the brim fixed and reusing the factorization"""
+        amp = self.amp
+        amp.vert = amp.vert.astype(float)
+        vert = amp.vert.copy()
+        amp.implicit_smooth(lam=2.0)
+        U = amp.calcUmbrella()
+        x = amp.vert
+        self.assertTrue(np.allclose(x + 2.0 * (x - U.dot(x)), vert))
+        eidx = (amp.faceEdges == -99999).any(axis=1)
+        vBrim = np.unique(amp.edges[eidx, :])
+        self.assertTrue(np.allclose(x[vBrim], vert[vBrim]))
+        lu = amp.calcSmoothSolver(lam=2.0)
+        self.assertIs(amp.calcSmoothSolver(lam=2.0), lu)
+        # Smoothing another mesh with the same faces using the factorization
+        self.amp2.implicit_smooth(solver=lu)
+        self.assertTrue(np.allclose(self.amp2.vert, x, atol=1e-4))
+        # The cotangent Laplacian depends on the vertices 
+        amp.implicit_smooth(lam=2.0, cot=True)
+        self.assertTrue(np.isfinite(amp.vert).all())
+        self.assertTrue(np.allclose(amp.vert[vBrim], vert[vBrim]))
+
+    def test_implicit_smooth_copy(self):
+        """Tests that the object can still be copied and pickled after an 
+        implicit smooth, with the factorization recalculated on the copy"""
+        import copy
+        import pickle
+        amp = self.amp
+        amp.implicit_smooth(lam=2.0)
+        lu = amp.calcSmoothSolver(lam=2.0)
+        for new in [copy.deepcopy(amp), pickle.loads(pickle.dumps(amp))]:
+            self.assertTrue(np.array_equal(new.vert, amp.vert))
+            self.assertFalse(new.isCached('smoothSolver'))
+            self.assertIsNot(new.calcSmoothSolver(lam=2.0), lu)
+        # The original keeps its factorization
+        self.assertIs(amp.calcSmoothSolver(lam=2.0), lu)
+
+    def test_coincident_all(self):
+        """Tests that all the coincident vertices are separated and the other 
+        vertices are not moved"""
+        from ampscan.utils import findCoincident
+        amp = self.amp4
+        # Nothing is coincident, so the cached structure is kept
+        amp.vertTree
+        amp.adjustCoincident(beta=0.6)
+        self.assertTrue(amp.isCached('vertTree'))
+        rng = np.random.default_rng(0)
+        ind = rng.choice(len(amp.vert), 200, replace=False)
+        amp.vert[ind[:100]] = amp.vert[ind[100:]]
+        amp.markModified()
+        self.assertTrue(np.array_equal(findCoincident(amp.vert), np.sort(ind)))
+        vert = amp.vert.copy()
+        amp.adjustCoincident(beta=0.6)
+        self.assertFalse(amp.isCached('vertTree'))
+        self.assertEqual(len(np.unique(amp.vert, axis=0)), len(amp.vert))
+        moved = np.flatnonzero((amp.vert != vert).any(axis=1))
+        self.assertTrue(np.isin(moved, ind).all())
+
+    def test_smoothing_fields(self):
+        """Tests that smoothing several fields at once matches smoothing each 
+        one in turn"""
+        amp = self.amp
+        rng = np.random.default_rng(0)
+        fields = rng.random([len(amp.vert), 4])
+        smooth = amp.smoothValues(3, fields)
+        self.assertEqual(smooth.shape, fields.shape)
+        for i in range(4):
+            amp.values = fields[:, i].copy()
+            amp.smoothValues(3)
+            self.assertTrue(np.allclose(amp.values, smooth[:, i]))
+        # The input fields are not modified
+        self.assertFalse(np.allclose(smooth, fields))
+        with self.assertRaises(ValueError):
+            amp.smoothValues(1, fields[1:])